@@ -1,21 +1,90 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context, send_from_directory, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_cors import CORS
 from flask_jwt_extended import (
     JWTManager, create_access_token, jwt_required, get_jwt_identity
 )
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 import os
-from datetime import datetime
+import io
+import gzip
+import time
+import bisect
+import re
+import csv
+import random
+import base64
+import hashlib
+import threading
+import tempfile
+import multiprocessing
+import sqlite3
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
+from datetime import datetime, timedelta
 import json
+from urllib.parse import urlencode
 from flask_migrate import Migrate
+import click
+from sqlalchemy import event, tuple_
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are skipped without Pillow
+    Image = None
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib json encoder
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # responses are JSON only
+    msgpack = None
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DATABASE_URL")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'super-secret')
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
+app.config['THUMBNAIL_SIZES'] = {'small': 160, 'medium': 480}
+app.config['THUMBNAIL_WORKERS'] = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 4))
+app.config['PASSWORD_HASH_NICE'] = int(os.environ.get('PASSWORD_HASH_NICE', 19))
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 0))
+app.config['QUERY_COUNT_HEADER'] = os.environ.get('QUERY_COUNT_HEADER') == '1'
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', 50))
+app.config['MAX_PAGE_SIZE'] = int(os.environ.get('MAX_PAGE_SIZE', 500))
+app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+app.config['FACET_SIZE'] = int(os.environ.get('FACET_SIZE', 100))
+app.config['SEARCH_CANDIDATES'] = int(os.environ.get('SEARCH_CANDIDATES', 1000))
+app.config['COMPRESS_RESPONSES'] = os.environ.get('COMPRESS_RESPONSES', '1') == '1'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['DATABASE_READ_URL'] = os.environ.get('DATABASE_READ_URL')
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -65536)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+}
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
@@ -24,8 +93,119 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-db = SQLAlchemy(app)
-CORS(app)
+# Cover images are stored under the SHA-256 of their content, so identical
+# uploads share one file and a stored file never changes.
+CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{64}\.[a-z]+$')
+COVER_CACHE_SECONDS = 365 * 24 * 3600
+
+thumbnail_executor = ThreadPoolExecutor(
+    max_workers=app.config['THUMBNAIL_WORKERS'], thread_name_prefix='thumbnails'
+)
+
+def thumbnail_path(size, filename):
+    return os.path.join(app.config['UPLOAD_FOLDER'], 'thumbs', size, filename)
+
+def store_cover(file):
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(64 * 1024), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        filename = f'{digest.hexdigest()}.{ext}'
+        path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if Image is not None:
+        thumbnail_executor.submit(generate_thumbnails, filename)
+    return filename
+
+def generate_thumbnails(filename):
+    source = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    for size, pixels in app.config['THUMBNAIL_SIZES'].items():
+        target = thumbnail_path(size, filename)
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            with Image.open(source) as image:
+                fmt = image.format
+                image.thumbnail((pixels, pixels))
+                if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                partial = f'{target}.{threading.get_ident()}.part'
+                image.save(partial, format=fmt)
+                os.replace(partial, target)
+        except Exception:
+            app.logger.exception('Thumbnail generation failed for %s', filename)
+            return
+
+def cover_urls(filename):
+    if not filename:
+        return None
+    urls = {'original': f'/covers/original/{filename}'}
+    for size in app.config['THUMBNAIL_SIZES']:
+        urls[size] = f'/covers/{size}/{filename}'
+    return urls
+
+# Database engines. SQLite connections are tuned by PRAGMAs on connect;
+# server databases get a bounded, self-healing connection pool. With
+# DATABASE_READ_URL set, GET requests read from that engine (a replica or a
+# read-only connection to the same SQLite file) while writes stay on the
+# primary.
+def engine_options(url):
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_recycle': app.config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+if app.config['SQLALCHEMY_DATABASE_URI']:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+if app.config['DATABASE_READ_URL']:
+    app.config['SQLALCHEMY_BINDS'] = {
+        'replica': {'url': app.config['DATABASE_READ_URL'], **engine_options(app.config['DATABASE_READ_URL'])},
+    }
+
+@event.listens_for(Engine, 'connect')
+def configure_sqlite(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # busy_timeout first, so switching to WAL waits out other connections.
+    for name in ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size'):
+        value = app.config['SQLITE_PRAGMAS'][name]
+        if value is None:
+            continue
+        try:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        except sqlite3.OperationalError:
+            # A read-only connection can't change the journal mode; it
+            # inherits whatever the file already uses.
+            if name != 'journal_mode':
+                raise
+    cursor.close()
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context()
+                and request.method in ('GET', 'HEAD') and 'replica' in self._db.engines):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+CORS(app, expose_headers=['X-Next-Cursor', 'Link', 'X-Query-Count', 'X-DB-Time-Ms'])
 jwt = JWTManager(app)
 migrate = Migrate(app, db)
 
@@ -37,17 +217,20 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
     def to_dict(self):
         return {'id': self.id, 'username': self.username}
 
 class Author(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=True)
     birth_year = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized so listings don't load every book; kept in step by the
+    # book write routes via adjust_book_count().
+    book_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     books = db.relationship('Book', backref='author', lazy=True, cascade='all, delete-orphan')
 
@@ -58,7 +241,7 @@ class Author(db.Model):
             'email': self.email,
             'birth_year': self.birth_year,
             'created_at': self.created_at.isoformat(),
-            'book_count': len(self.books)
+            'book_count': self.book_count
         }
 
 class Category(db.Model):
@@ -77,37 +260,48 @@ class Category(db.Model):
 
 class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False)
-    isbn = db.Column(db.String(20), nullable=True)
-    publication_year = db.Column(db.Integer, nullable=True)
+    title = db.Column(db.String(200), nullable=False, index=True)
+    isbn = db.Column(db.String(20), nullable=True, index=True)
+    publication_year = db.Column(db.Integer, nullable=True, index=True)
     pages = db.Column(db.Integer, nullable=True)
     description = db.Column(db.Text, nullable=True)
     cover_image = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
-    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable=False, index=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'isbn': self.isbn,
-            'publication_year': self.publication_year,
-            'pages': self.pages,
-            'description': self.description,
-            'cover_image': self.cover_image,
-            'author_id': self.author_id,
-            'author_name': self.author.name if self.author else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'categories': [bc.to_dict() for bc in self.book_categories]
-        }
+    def to_dict(self, fields=None):
+        return {name: BOOK_FIELDS[name](self) for name in fields or BOOK_FIELDS}
+
+BOOK_FIELDS = {
+    'id': lambda book: book.id,
+    'title': lambda book: book.title,
+    'isbn': lambda book: book.isbn,
+    'publication_year': lambda book: book.publication_year,
+    'pages': lambda book: book.pages,
+    'description': lambda book: book.description,
+    'cover_image': lambda book: book.cover_image,
+    'cover_urls': lambda book: cover_urls(book.cover_image),
+    'author_id': lambda book: book.author_id,
+    'author_name': lambda book: book.author.name if book.author else None,
+    'created_at': lambda book: book.created_at.isoformat(),
+    'updated_at': lambda book: book.updated_at.isoformat(),
+    'categories': lambda book: [bc.to_dict() for bc in book.book_categories],
+}
+
+# Book columns a field reads when it isn't simply the column of that name,
+# so ?fields= can SELECT only what it renders.
+BOOK_FIELD_COLUMNS = {
+    'cover_urls': ['cover_image'],
+    'author_name': ['author_id'],
+    'categories': [],
+}
 
 class BookCategory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     book_id = db.Column(db.Integer, db.ForeignKey('book.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False, index=True)
     priority = db.Column(db.Integer, nullable=False, default=1)
     notes = db.Column(db.String(200), nullable=True)
     assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -128,6 +322,1155 @@ class BookCategory(db.Model):
             'assigned_at': self.assigned_at.isoformat()
         }
 
+class ChangeLog(db.Model):
+    # Append-only feed behind /api/changes; the id is the sync cursor.
+    # AUTOINCREMENT stops SQLite from reusing ids after old rows are pruned.
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+class CacheGeneration(db.Model):
+    # A single row bumped inside every write transaction. Cached responses are
+    # keyed by its value, so a write from any worker or CLI command
+    # invalidates the caches of every process.
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+@event.listens_for(CacheGeneration.__table__, 'after_create')
+def seed_cache_generation(target, connection, **kw):
+    connection.execute(target.insert().values(id=1, value=0))
+
+# Full-text search (SQLite FTS5). The index is a plain FTS5 table keyed by
+# book id; triggers keep it in sync with book and author writes.
+SEARCH_TRIGGERS = {
+    'book_fts_ai':
+        "CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN "
+        "INSERT INTO book_fts(rowid, title, description, author_name) "
+        "SELECT new.id, new.title, new.description, (SELECT name FROM author WHERE id = new.author_id); "
+        "END",
+    'book_fts_au':
+        "CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, description, author_id ON book BEGIN "
+        "DELETE FROM book_fts WHERE rowid = old.id; "
+        "INSERT INTO book_fts(rowid, title, description, author_name) "
+        "SELECT new.id, new.title, new.description, (SELECT name FROM author WHERE id = new.author_id); "
+        "END",
+    'book_fts_ad':
+        "CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN "
+        "DELETE FROM book_fts WHERE rowid = old.id; "
+        "END",
+    'author_fts_au':
+        "CREATE TRIGGER IF NOT EXISTS author_fts_au AFTER UPDATE OF name ON author BEGIN "
+        "UPDATE book_fts SET author_name = new.name "
+        "WHERE rowid IN (SELECT id FROM book WHERE author_id = new.id); "
+        "END",
+}
+
+SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5("
+    "title, description, author_name, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO book_fts(book_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 5.0)')",
+    *SEARCH_TRIGGERS.values(),
+]
+
+@event.listens_for(db.metadata, 'after_create')
+def create_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in SEARCH_INDEX_DDL:
+            connection.exec_driver_sql(statement)
+
+def fts_query(text):
+    # Quote every term so user input can't inject FTS5 operators. "quoted
+    # phrases" stay phrases and a trailing * keeps prefix matching.
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if phrase.strip():
+            terms.append(f'"{phrase}"')
+        elif word:
+            prefix = '*' if word.endswith('*') else ''
+            word = word.replace('"', '').rstrip('*')
+            if word:
+                terms.append(f'"{word}"{prefix}')
+    return ' '.join(terms)
+
+def book_load_options(fields=None, *columns):
+    # Fetch the author in the same SELECT and the category links (with their
+    # categories) in one extra SELECT, so serializing N books costs 2 queries.
+    if fields is None:
+        return (
+            joinedload(Book.author),
+            selectinload(Book.book_categories).joinedload(BookCategory.category),
+        )
+    # Sparse fieldsets load only the columns and relationships they render;
+    # `columns` adds any the caller needs itself, such as the sort key.
+    names = {'id', *columns}
+    for name in fields:
+        names.update(BOOK_FIELD_COLUMNS.get(name, [name]))
+    options = [load_only(*(getattr(Book, name) for name in sorted(names)))]
+    if 'author_name' in fields:
+        options.append(joinedload(Book.author).load_only(Author.name))
+    if 'categories' in fields:
+        options.append(selectinload(Book.book_categories).joinedload(BookCategory.category))
+    return options
+
+def book_fields():
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BOOK_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(['id', *names]))
+
+def adjust_book_count(author_id, delta):
+    Author.query.filter_by(id=author_id).update(
+        {Author.book_count: Author.book_count + delta}, synchronize_session=False
+    )
+    record_changes('author', [author_id])
+
+def apply_book_update(book, data, deltas):
+    # Validate before changing anything on the book.
+    author_id = int_field(data, 'author_id')
+    if author_id and author_id != book.author_id and db.session.get(Author, author_id) is None:
+        raise ApiError('Author not found')
+    categories = category_links(data['categories']) if 'categories' in data else None
+
+    if data.get('title'):
+        book.title = data['title']
+    if data.get('isbn'):
+        book.isbn = data['isbn']
+    if data.get('publication_year'):
+        year = int_field(data, 'publication_year')
+        deltas['decades'][year_decade(book.publication_year)] -= 1
+        deltas['decades'][year_decade(year)] += 1
+        book.publication_year = year
+    if data.get('pages'):
+        book.pages = data['pages']
+    if data.get('description'):
+        book.description = data['description']
+    if author_id and author_id != book.author_id:
+        deltas['authors'][book.author_id] -= 1
+        deltas['authors'][author_id] += 1
+        book.author_id = author_id
+    if categories is not None:
+        sync_book_categories(book, categories, deltas['categories'])
+
+def category_links(categories):
+    # Maps category_id to its link data: [{'category_id': 1, 'priority': 2}]
+    # becomes {1: {'category_id': 1, 'priority': 2}}.
+    try:
+        return {int(cat_data['category_id']): cat_data for cat_data in categories}
+    except (TypeError, ValueError, KeyError):
+        raise ApiError('Invalid categories format')
+
+def sync_book_categories(book, wanted, category_deltas):
+    # Apply the requested links as a diff so unchanged rows (and their
+    # assigned_at) are left alone.
+    current = {link.category_id: link for link in book.book_categories}
+    for category_id, link in current.items():
+        if category_id not in wanted:
+            db.session.delete(link)
+            category_deltas[category_id] -= 1
+    for category_id, cat_data in wanted.items():
+        priority = cat_data.get('priority', 1)
+        notes = cat_data.get('notes')
+        link = current.get(category_id)
+        if link is None:
+            db.session.add(BookCategory(book_id=book.id, category_id=category_id, priority=priority, notes=notes))
+            category_deltas[category_id] += 1
+        else:
+            if link.priority != priority:
+                link.priority = priority
+            if link.notes != notes:
+                link.notes = notes
+
+def change_feed_enabled():
+    # The /api/changes id cursor relies on SQLite's single writer: ids become
+    # visible in commit order. Concurrent writers on a server database can
+    # commit a lower id after a client has already read past it, so other
+    # databases keep no feed at all.
+    return db.engine.dialect.name == 'sqlite'
+
+def record_changes(entity, ids, action='upsert'):
+    if not change_feed_enabled():
+        return
+    now = datetime.utcnow()
+    rows = [{'entity': entity, 'entity_id': entity_id, 'action': action, 'changed_at': now} for entity_id in ids]
+    if rows:
+        db.session.execute(ChangeLog.__table__.insert(), rows)
+
+def iter_book_batches(batch_size, fields=None):
+    # Windowed keyset reads by id; the session is emptied after each batch so
+    # memory stays flat no matter how large the catalog is.
+    last_id = 0
+    while True:
+        books = (
+            Book.query.options(*book_load_options(fields))
+            .filter(Book.id > last_id)
+            .order_by(Book.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not books:
+            return
+        last_id = books[-1].id
+        yield [book.to_dict(fields) for book in books]
+        db.session.expunge_all()
+
+def iter_book_export(fmt, batch_size, fields=None):
+    dumps = app.json.dumps
+    if fmt == 'ndjson':
+        for batch in iter_book_batches(batch_size, fields):
+            yield ''.join(dumps(book) + '\n' for book in batch)
+        return
+
+    separator = ''
+    yield '['
+    for batch in iter_book_batches(batch_size, fields):
+        yield separator + ',\n'.join(dumps(book) for book in batch)
+        separator = ',\n'
+    yield ']\n'
+
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
+def iter_import_rows(stream, fmt):
+    # Yields (line number, row dict or None when the line can't be parsed).
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if row.get('categories'):
+                # Entries are category ids when numeric, names otherwise.
+                row['categories'] = [
+                    int(entry) if entry.isdigit() else entry
+                    for entry in (entry.strip() for entry in row['categories'].split('|')) if entry
+                ]
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+def optional_int(row, field):
+    value = row.get(field)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be an integer')
+
+IMPORT_BOOK_COLUMNS = ('title', 'isbn', 'publication_year', 'pages', 'description', 'author_id')
+
+class BookImporter:
+    # Streams rows into the book tables in batches: names are resolved
+    # through in-memory maps (creating missing authors and categories only
+    # for rows that are written), rows go in with executemany, and each batch
+    # is a single transaction. With upsert=True, rows whose ISBN already
+    # exists update that book instead of inserting a new one.
+    def __init__(self, upsert=False, batch_size=None, max_errors=1000):
+        self.upsert = upsert
+        self.batch_size = batch_size or app.config['IMPORT_BATCH_SIZE']
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.load_lookups()
+
+    def load_lookups(self):
+        connection = db.session.connection()
+        self.paramstyle = connection.dialect.paramstyle
+        self.search_index = connection.dialect.name == 'sqlite' and db.inspect(connection).has_table('book_fts')
+        self.author_ids = {}
+        for author_id, name in db.session.execute(db.select(Author.id, Author.name).order_by(Author.id.desc())):
+            self.author_ids[name] = author_id
+        self.known_author_ids = set(self.author_ids.values())
+        self.category_ids = dict(db.session.execute(db.select(Category.name, Category.id)).all())
+        self.known_category_ids = set(self.category_ids.values())
+
+    def run(self, rows):
+        batch = []
+        for line_number, row in rows:
+            try:
+                batch.append((line_number, self.parse(row)))
+            except ValueError as error:
+                self.fail(line_number, str(error))
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        return self.report()
+
+    def fail(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def report(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+    def parse(self, row):
+        if row is None:
+            raise ValueError('Invalid row')
+        title = row.get('title')
+        if not title or not isinstance(title, str):
+            raise ValueError('title is required')
+
+        author_name = row.get('author') or row.get('author_name')
+        author_id = None
+        if author_name is not None:
+            author_name = str(author_name).strip()
+            if not author_name:
+                raise ValueError('author must not be empty')
+        else:
+            author_id = optional_int(row, 'author_id')
+            if author_id is None:
+                raise ValueError('author or author_id is required')
+            if author_id not in self.known_author_ids:
+                raise ValueError(f'Author {author_id} not found')
+
+        categories = row.get('categories') or []
+        if not isinstance(categories, list):
+            raise ValueError('categories must be a list')
+        links = {}
+        for entry in categories:
+            if isinstance(entry, dict):
+                link = {'priority': entry.get('priority', 1), 'notes': entry.get('notes')}
+                category = entry.get('category_id', entry.get('category_name'))
+            else:
+                link = {'priority': 1, 'notes': None}
+                category = entry
+            if isinstance(category, int) and not isinstance(category, bool):
+                if category not in self.known_category_ids:
+                    raise ValueError(f'Category {category} not found')
+                link['category_id'] = category
+            elif isinstance(category, str) and category.strip():
+                link['category_name'] = category.strip()
+            else:
+                raise ValueError('Invalid category entry')
+            links[link.get('category_id', link.get('category_name'))] = link
+
+        isbn = row.get('isbn')
+        return {
+            'title': title,
+            'isbn': str(isbn) if isbn is not None else None,
+            'publication_year': optional_int(row, 'publication_year'),
+            'pages': optional_int(row, 'pages'),
+            'description': row.get('description'),
+            'author_id': author_id,
+            'author_name': author_name,
+            'categories': list(links.values()),
+        }
+
+    def resolve_names(self, book):
+        if book['author_id'] is None:
+            book['author_id'] = self.resolve_author(book['author_name'])
+        links = {}
+        for link in book['categories']:
+            if 'category_name' in link:
+                link['category_id'] = self.resolve_category(link.pop('category_name'))
+            links[link['category_id']] = link
+        book['categories'] = list(links.values())
+
+    def resolve_author(self, name):
+        if name not in self.author_ids:
+            author_id = db.session.execute(db.insert(Author).values(name=name)).inserted_primary_key[0]
+            self.author_ids[name] = author_id
+            self.known_author_ids.add(author_id)
+        return self.author_ids[name]
+
+    def resolve_category(self, name):
+        if name not in self.category_ids:
+            category_id = db.session.execute(db.insert(Category).values(name=name)).inserted_primary_key[0]
+            self.category_ids[name] = category_id
+            self.known_category_ids.add(category_id)
+        return self.category_ids[name]
+
+    def write(self, batch):
+        existing = {}
+        if self.upsert:
+            # Chunked like the search reindex below, to stay under SQLite's
+            # bound-variable limit on large batches.
+            isbns = list({book['isbn'] for _, book in batch if book['isbn']})
+            for start in range(0, len(isbns), 500):
+                existing.update(
+                    (isbn, (book_id, author_id))
+                    for isbn, book_id, author_id in db.session.execute(
+                        db.select(Book.isbn, Book.id, Book.author_id).where(Book.isbn.in_(isbns[start:start + 500]))
+                    )
+                )
+
+        inserts, upserts, updates = [], {}, {}
+        for _, book in batch:
+            if not self.upsert or not book['isbn']:
+                inserts.append(book)
+            elif book['isbn'] in existing:
+                updates[book['isbn']] = book
+            else:
+                # A repeated ISBN inside one batch: the last row wins.
+                upserts[book['isbn']] = book
+        inserts.extend(upserts.values())
+        updates = list(updates.values())
+
+        connection = db.session.connection()
+        now = datetime.utcnow()
+        if connection.dialect.name == 'sqlite':
+            # Bound as text in the format SQLAlchemy itself stores.
+            now = now.isoformat(' ', 'microseconds')
+        book_count_deltas = Counter()
+        book_ids = []
+        links = []
+        try:
+            for book in inserts + updates:
+                self.resolve_names(book)
+            if self.search_index:
+                # Per-row FTS triggers dominate bulk load time; index the
+                # batch with one INSERT ... SELECT instead. The triggers are
+                # dropped inside this transaction, so a rollback restores them
+                # (pysqlite only opens a transaction on its own before DML).
+                if not connection.connection.dbapi_connection.in_transaction:
+                    connection.exec_driver_sql('BEGIN')
+                for name in ('book_fts_ai', 'book_fts_au'):
+                    connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+
+            if inserts:
+                ids = self.insert_books(connection, inserts, now)
+                for book_id, book in zip(ids, inserts):
+                    book_count_deltas[book['author_id']] += 1
+                    book_ids.append(book_id)
+                    links.extend((book_id, c['category_id'], c['priority'], c['notes'], now) for c in book['categories'])
+
+            if updates:
+                rows = []
+                for book in updates:
+                    book_id, old_author_id = existing[book['isbn']]
+                    book_count_deltas[old_author_id] -= 1
+                    book_count_deltas[book['author_id']] += 1
+                    book_ids.append(book_id)
+                    rows.append(tuple(book[column] for column in IMPORT_BOOK_COLUMNS) + (now, book_id))
+                    links.extend((book_id, c['category_id'], c['priority'], c['notes'], now) for c in book['categories'])
+                connection.exec_driver_sql(self.sql(
+                    'UPDATE book SET ' + ', '.join(f'{column} = {{}}' for column in IMPORT_BOOK_COLUMNS)
+                    + ', updated_at = {} WHERE id = {}'
+                ), rows)
+                connection.exec_driver_sql(
+                    self.sql('DELETE FROM book_category WHERE book_id = {}'),
+                    [(existing[book['isbn']][0],) for book in updates],
+                )
+
+            if links:
+                connection.exec_driver_sql(self.sql(
+                    'INSERT INTO book_category (book_id, category_id, priority, notes, assigned_at) '
+                    'VALUES ({}, {}, {}, {}, {})'
+                ), links)
+
+            deltas = [(delta, author_id) for author_id, delta in book_count_deltas.items() if delta]
+            if deltas:
+                connection.exec_driver_sql(
+                    self.sql('UPDATE author SET book_count = book_count + {} WHERE id = {}'), deltas
+                )
+
+            changes = [('book', book_id, 'upsert', now) for book_id in book_ids]
+            changes.extend(('author', author_id, 'upsert', now) for _, author_id in deltas)
+            if changes and change_feed_enabled():
+                connection.exec_driver_sql(self.sql(
+                    'INSERT INTO change_log (entity, entity_id, action, changed_at) VALUES ({}, {}, {}, {})'
+                ), changes)
+
+            if self.search_index:
+                for statement in SEARCH_TRIGGERS.values():
+                    connection.exec_driver_sql(statement)
+                for start in range(0, len(book_ids), 500):
+                    chunk = book_ids[start:start + 500]
+                    marks = ', '.join('?' * len(chunk))
+                    connection.exec_driver_sql(f'DELETE FROM book_fts WHERE rowid IN ({marks})', tuple(chunk))
+                    connection.exec_driver_sql(
+                        'INSERT INTO book_fts(rowid, title, description, author_name) '
+                        'SELECT book.id, book.title, book.description, author.name '
+                        f'FROM book JOIN author ON author.id = book.author_id WHERE book.id IN ({marks})',
+                        tuple(chunk),
+                    )
+            bump_generation()
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            # The rollback also discards authors and categories created for
+            # this batch, so reload the lookup maps from the database.
+            self.load_lookups()
+            message = f'Batch failed: {getattr(error, "orig", error)}'
+            for line_number, _ in batch:
+                self.fail(line_number, message)
+            return
+
+        self.inserted += len(inserts)
+        self.updated += len(updates)
+
+    def sql(self, statement):
+        # Raw executemany skips SQLAlchemy's per-row parameter processing.
+        return statement.format(*['?' if self.paramstyle == 'qmark' else '%s'] * statement.count('{}'))
+
+    def insert_books(self, connection, books, now):
+        if connection.dialect.name != 'sqlite':
+            return db.session.scalars(
+                db.insert(Book).returning(Book.id, sort_by_parameter_order=True),
+                [dict({column: book[column] for column in IMPORT_BOOK_COLUMNS}, created_at=now, updated_at=now)
+                 for book in books],
+            ).all()
+        # SQLite assigns max(rowid) + 1 and this transaction holds the write
+        # lock, so the new ids are the contiguous range ending at max(id).
+        connection.exec_driver_sql(
+            'INSERT INTO book (' + ', '.join(IMPORT_BOOK_COLUMNS) + ', created_at, updated_at) '
+            'VALUES (' + ', '.join('?' * (len(IMPORT_BOOK_COLUMNS) + 2)) + ')',
+            [tuple(book[column] for column in IMPORT_BOOK_COLUMNS) + (now, now) for book in books],
+        )
+        last_id = connection.exec_driver_sql('SELECT MAX(id) FROM book').scalar()
+        return range(last_id - len(books) + 1, last_id + 1)
+
+def bump_generation():
+    # Call inside the write transaction, before commit. Returns the new value.
+    table = CacheGeneration.__table__
+    db.session.execute(table.update().where(table.c.id == 1).values(value=table.c.value + 1))
+    return current_generation()
+
+def current_generation():
+    return db.session.execute(db.select(CacheGeneration.value).where(CacheGeneration.id == 1)).scalar() or 0
+
+class ResponseCache:
+    # Bounded LRU of serialized GET responses. Every key embeds the shared
+    # write generation; once a request sees a newer one, older entries can
+    # never match again and are dropped.
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            if key[0] != self.generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def sync(self, generation):
+        with self._lock:
+            if self.generation is None or generation > self.generation:
+                self.generation = generation
+                self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self.generation = None
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'generation': self.generation,
+            }
+
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_SIZE'])
+
+def cached_response(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Read once per cached request; the view can reuse it from g.
+        g.cache_generation = generation = current_generation()
+        response_cache.sync(generation)
+        key = (
+            generation, request.path, tuple(sorted(request.args.items(multi=True))),
+            response_format(), response_encoding(),
+        )
+        entry = response_cache.get(key)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            compress_response(response)
+            response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+            response.cache_control.no_cache = True
+            response_cache.set(key, (response.get_data(), list(response.headers)))
+        else:
+            body, headers = entry
+            response = app.response_class(body, headers=headers)
+        return response.make_conditional(request)
+    return wrapper
+
+# Catalog facets. Each is a grouped aggregate over the whole catalog (or over
+# the books matching the listing filters when `books` is given).
+def category_counts(books=None):
+    query = db.session.query(BookCategory.category_id, db.func.count()).group_by(BookCategory.category_id)
+    if books is not None:
+        query = query.filter(BookCategory.book_id.in_(books.with_entities(Book.id)))
+    return Counter(dict(query.all()))
+
+def decade_counts(books=None):
+    # Grouping by year walks the publication_year index in order; folding
+    # years into decades here keeps the SQL index-friendly.
+    query = books if books is not None else Book.query
+    rows = (
+        query.with_entities(Book.publication_year, db.func.count())
+        .filter(Book.publication_year.isnot(None))
+        .group_by(Book.publication_year)
+        .all()
+    )
+    counts = Counter()
+    for year, n in rows:
+        decade = year_decade(year)
+        if decade is not None:
+            counts[decade] += n
+    return counts
+
+def author_facet(books=None):
+    if books is None:
+        # book_count is kept up to date by every write, so no GROUP BY needed.
+        rows = (
+            db.session.query(Author.id, Author.name, Author.book_count)
+            .filter(Author.book_count > 0)
+            .order_by(Author.book_count.desc(), Author.id)
+            .limit(app.config['FACET_SIZE'])
+            .all()
+        )
+    else:
+        count = db.func.count()
+        rows = (
+            books.join(Book.author)
+            .with_entities(Author.id, Author.name, count)
+            .group_by(Author.id)
+            .order_by(count.desc(), Author.id)
+            .limit(app.config['FACET_SIZE'])
+            .all()
+        )
+    return [{'id': author_id, 'name': name, 'count': n} for author_id, name, n in rows]
+
+FACETS = {
+    'categories': category_counts,
+    'authors': author_facet,
+    'decades': decade_counts,
+}
+
+def facet_deltas():
+    # Count changes made by a write, keyed by author id, category id and decade.
+    return {name: Counter() for name in FACETS}
+
+def year_decade(year):
+    try:
+        return int(year) // 10 * 10
+    except (TypeError, ValueError):
+        return None  # unset, or a bad value stored before years were validated
+
+def facet_response(name, value):
+    if name == 'categories':
+        names = dict(db.session.query(Category.id, Category.name).filter(Category.id.in_(value)).all()) if value else {}
+        facet = [{'id': category_id, 'name': names.get(category_id), 'count': n} for category_id, n in value.items()]
+        return sorted(facet, key=lambda item: (-item['count'], item['id']))
+    if name == 'decades':
+        return [{'decade': decade, 'count': n} for decade, n in sorted(value.items())]
+    return value
+
+class FacetCache:
+    # Unfiltered facets, each tagged with the cache generation it was
+    # computed at. Writes patch the cached
+    # counts with their deltas instead of recomputing the aggregates, but
+    # only for entries exactly one generation behind theirs; anything older
+    # missed a write (possibly from another process) and is dropped, as is
+    # a facet that can't be patched (the top-N author list).
+    def __init__(self, loaders):
+        self.loaders = loaders
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, generation):
+        with self._lock:
+            entry = self._values.get(name)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        value = self.loaders[name]()
+        # SQLite runs each SELECT in its own implicit transaction, so a write
+        # may have committed between reading the generation and loading. The
+        # value would already include it, and patching it with that write's
+        # deltas would count it twice; only cache it if nothing changed.
+        if current_generation() != generation:
+            return value
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is None or entry[0] < generation:
+                self._values[name] = (generation, value)
+        return value
+
+    def apply(self, generation, deltas):
+        with self._lock:
+            for name, changes in deltas.items():
+                entry = self._values.get(name)
+                if entry is None or entry[0] >= generation:
+                    continue
+                computed_at, value = entry
+                changes = {key: n for key, n in changes.items() if key is not None and n}
+                if computed_at != generation - 1 or (changes and not isinstance(value, Counter)):
+                    del self._values[name]
+                    continue
+                if changes:
+                    value = value + Counter()
+                    value.update(changes)
+                    value = +value
+                self._values[name] = (generation, value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+facet_cache = FacetCache(FACETS)
+
+# Instrumentation. Engine events count statements and DB time per request;
+# request hooks fold them into per-route series served at /metrics.
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = Counter()
+
+class Metrics:
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, route, status, seconds, statements, db_seconds, size):
+        with self._lock:
+            series = self._routes.get((method, route))
+            if series is None:
+                series = self._routes[(method, route)] = RouteMetrics()
+            series.latency.observe(seconds)
+            series.statements.observe(statements)
+            series.db_seconds += db_seconds
+            series.response_bytes += size
+            series.statuses[status] += 1
+
+    def render(self):
+        lines = [
+            '# HELP library_http_request_duration_seconds Request latency.',
+            '# TYPE library_http_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            routes = sorted(self._routes.items())
+            for (method, route), series in routes:
+                lines += series.latency.render('library_http_request_duration_seconds', f'method="{method}",route="{route}"')
+            lines += [
+                '# HELP library_db_statements_per_request SQL statements executed per request.',
+                '# TYPE library_db_statements_per_request histogram',
+            ]
+            for (method, route), series in routes:
+                lines += series.statements.render('library_db_statements_per_request', f'method="{method}",route="{route}"')
+            lines += [
+                '# HELP library_db_seconds_total Time spent executing SQL.',
+                '# TYPE library_db_seconds_total counter',
+            ]
+            lines += [
+                f'library_db_seconds_total{{method="{method}",route="{route}"}} {series.db_seconds}'
+                for (method, route), series in routes
+            ]
+            lines += [
+                '# HELP library_http_response_bytes_total Response body bytes.',
+                '# TYPE library_http_response_bytes_total counter',
+            ]
+            lines += [
+                f'library_http_response_bytes_total{{method="{method}",route="{route}"}} {series.response_bytes}'
+                for (method, route), series in routes
+            ]
+            lines += [
+                '# HELP library_http_requests_total Requests by status code.',
+                '# TYPE library_http_requests_total counter',
+            ]
+            lines += [
+                f'library_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}'
+                for (method, route), series in routes
+                for status, count in sorted(series.statuses.items())
+            ]
+
+        cache = response_cache.stats()
+        lines += [
+            '# TYPE library_response_cache_hits_total counter',
+            f"library_response_cache_hits_total {cache['hits']}",
+            '# TYPE library_response_cache_misses_total counter',
+            f"library_response_cache_misses_total {cache['misses']}",
+            '# TYPE library_response_cache_entries gauge',
+            f"library_response_cache_entries {cache['entries']}",
+        ]
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start'] = time.perf_counter()
+
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(context):
+    # after_cursor_execute doesn't run for a failed statement.
+    if context.connection is not None:
+        context.connection.info.pop('query_start', None)
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('query_start')
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+    slow_ms = app.config['SLOW_QUERY_MS']
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        app.logger.warning(
+            'slow query (%.1f ms): %s params=%.500r', elapsed * 1000, ' '.join(statement.split()), parameters
+        )
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+@app.after_request
+def record_request(response):
+    if 'request_start' not in g:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe(
+        request.method, route, response.status_code, time.perf_counter() - g.request_start,
+        g.sql_statements, g.sql_seconds, response.content_length or 0,
+    )
+    if app.config['QUERY_COUNT_HEADER'] or app.debug:
+        response.headers['X-Query-Count'] = str(g.sql_statements)
+        response.headers['X-DB-Time-Ms'] = f'{g.sql_seconds * 1000:.2f}'
+    return response
+
+# Response encoding. JSON goes through orjson when it is installed, clients
+# that prefer MessagePack get it via the Accept header, and large bodies are
+# compressed with brotli or gzip per Accept-Encoding.
+MSGPACK_MIMETYPE = 'application/msgpack'
+COMPRESSIBLE_MIMETYPES = {'application/json', MSGPACK_MIMETYPE, 'text/plain', 'text/csv'}
+
+def response_format():
+    if msgpack is not None and has_request_context():
+        if request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+            return 'msgpack'
+    return 'json'
+
+def response_encoding():
+    if not app.config['COMPRESS_RESPONSES'] or not has_request_context():
+        return None
+    return request.accept_encodings.best_match(['br', 'gzip'] if brotli is not None else ['gzip'])
+
+class ApiJSONProvider(DefaultJSONProvider):
+    def orjson_option(self, indent=False):
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        return (option | orjson.OPT_INDENT_2) if indent else option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.orjson_option(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if response_format() == 'msgpack':
+            response = self._app.response_class(msgpack.packb(obj, default=self.default), mimetype=MSGPACK_MIMETYPE)
+        elif orjson is not None:
+            indent = self.compact is False or (self.compact is None and self._app.debug)
+            option = self.orjson_option(indent) | orjson.OPT_APPEND_NEWLINE
+            response = self._app.response_class(orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype)
+        else:
+            response = super().response(obj)
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+app.json = ApiJSONProvider(app)
+
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = response_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=5))
+    else:
+        response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Registered after the metrics hook so it runs first and /metrics counts the
+# bytes actually sent. Cached responses arrive already compressed.
+@app.after_request
+def compress(response):
+    return compress_response(response)
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, headers=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.headers = headers
+
+@app.errorhandler(ApiError)
+def handle_api_error(error):
+    # Nothing a rejected request changed may be flushed by a later one.
+    db.session.rollback()
+    return jsonify({'error': error.message}), error.status, error.headers
+
+def lower_priority(increment):
+    # Hash workers yield the CPU to request workers when both are runnable,
+    # so a login storm slows logins down rather than every other route.
+    if increment and hasattr(os, 'nice'):
+        os.nice(increment)
+
+class PasswordHasher:
+    # Runs hashing in a process pool so it never holds a request worker's
+    # CPU (or the GIL). At most max_pending hashes may be queued or running;
+    # beyond that callers get a 429 instead of waiting. Keep max_pending
+    # below the server's threads per worker, or a storm parks every thread.
+    def __init__(self, method, workers, max_pending, nice=0):
+        self.method = method
+        self.workers = workers
+        self.nice = nice
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ApiError('Too many authentication requests, try again shortly', 429, {'Retry-After': '1'})
+        try:
+            # A worker killed mid-hash (OOM killer, a stray signal) breaks the
+            # whole pool; replace it and try once more before giving up.
+            for attempt in range(2):
+                pool = self._get_pool()
+                try:
+                    return pool.submit(fn, *args).result()
+                except BrokenProcessPool:
+                    self._discard_pool(pool)
+            raise ApiError('Authentication is temporarily unavailable, try again shortly', 503,
+                           {'Retry-After': '1'})
+        finally:
+            self._slots.release()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            # Created on first use so each server worker gets its own pool.
+            # Workers are started by a forkserver (or spawned) rather than
+            # forked from a threaded server process, which could copy a lock
+            # some other thread holds.
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=lower_priority, initargs=(self.nice,))
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Compares the stored 'method:param:...' prefix with the configured
+        # method, without hashing. Parameters the method leaves out (e.g.
+        # plain 'scrypt') take whatever the stored hash has.
+        wanted = self.method.split(':')
+        return password_hash.split('$', 1)[0].split(':')[:len(wanted)] != wanted
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_METHOD'],
+    app.config['PASSWORD_HASH_WORKERS'],
+    app.config['PASSWORD_HASH_MAX_PENDING'],
+    app.config['PASSWORD_HASH_NICE'],
+)
+
+def int_field(data, name):
+    value = data.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(f'{name} must be an integer')
+
+def int_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(f'{name} must be an integer')
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != 2:
+        raise ApiError('Invalid cursor')
+    return values
+
+BOOK_FILTERS = ('author_id', 'category_id', 'year_from', 'year_to', 'title_prefix')
+
+def filter_books(query):
+    author_id = int_arg('author_id')
+    category_id = int_arg('category_id')
+    year_from = int_arg('year_from')
+    year_to = int_arg('year_to')
+    title_prefix = request.args.get('title_prefix')
+
+    if author_id is not None:
+        query = query.filter(Book.author_id == author_id)
+    if category_id is not None:
+        query = query.filter(Book.id.in_(
+            db.select(BookCategory.book_id).where(BookCategory.category_id == category_id)
+        ))
+    if year_from is not None:
+        query = query.filter(Book.publication_year >= year_from)
+    if year_to is not None:
+        query = query.filter(Book.publication_year <= year_to)
+    if title_prefix:
+        # A range instead of LIKE so the title index can be used.
+        query = query.filter(Book.title >= title_prefix, Book.title < title_prefix + '\U0010ffff')
+    return query
+
+def page_limit():
+    return min(max(int_arg('limit', app.config['PAGE_SIZE']), 1), app.config['MAX_PAGE_SIZE'])
+
+def paginate(query, model, sort_keys):
+    # Keyset pagination: the cursor carries the (sort value, id) of the last
+    # row, so every page is an index seek rather than an OFFSET scan.
+    sort = request.args.get('sort', 'id')
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    if key not in sort_keys:
+        raise ApiError(f"Invalid sort key '{key}', expected one of: {', '.join(sort_keys)}")
+    column = sort_keys[key]
+
+    limit = page_limit()
+    after = request.args.get('after')
+
+    if key == 'id':
+        position, order_by = model.id, [model.id]
+    else:
+        position, order_by = tuple_(column, model.id), [column, model.id]
+
+    if after:
+        value, last_id = decode_cursor(after)
+        if isinstance(column.type, db.DateTime) and value is not None:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ApiError('Invalid cursor')
+        boundary = last_id if key == 'id' else tuple_(value, last_id)
+        query = query.filter(position < boundary if descending else position > boundary)
+
+    if descending:
+        order_by = [c.desc() for c in order_by]
+    items = query.order_by(*order_by).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        value = getattr(items[-1], key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        next_cursor = encode_cursor([value, items[-1].id])
+    return items, next_cursor
+
+def page_response(data, next_cursor):
+    response = jsonify(data)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
+
 # Auth Routes
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -138,7 +1481,7 @@ def register():
     if User.query.filter_by(username=data['username']).first():
         return jsonify({'error': 'Username already taken'}), 409
 
-    hashed_pw = generate_password_hash(data['password'])
+    hashed_pw = password_hasher.hash(data['password'])
     user = User(username=data['username'], password_hash=hashed_pw)
     db.session.add(user)
     db.session.commit()
@@ -152,44 +1495,221 @@ def login():
     if not user or not user.check_password(data.get('password')):
         return jsonify({'error': 'Invalid credentials'}), 401
 
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = password_hasher.hash(data['password'])
+            db.session.commit()
+        except ApiError:
+            pass  # under load; upgrade the hash on a later login
+
     access_token = create_access_token(identity=user.id)
     return jsonify({'access_token': access_token, 'user': user.to_dict()})
 
 # Public Routes
 @app.route('/api/authors', methods=['GET'])
+@cached_response
 def get_authors():
-    authors = Author.query.all()
-    return jsonify([author.to_dict() for author in authors])
+    authors, next_cursor = paginate(Author.query, Author, {'id': Author.id, 'name': Author.name})
+    return page_response([author.to_dict() for author in authors], next_cursor)
 
 @app.route('/api/categories', methods=['GET'])
+@cached_response
 def get_categories():
-    categories = Category.query.all()
-    return jsonify([category.to_dict() for category in categories])
+    categories, next_cursor = paginate(Category.query, Category, {'id': Category.id, 'name': Category.name})
+    return page_response([category.to_dict() for category in categories], next_cursor)
+
+@app.route('/api/stats/facets', methods=['GET'])
+@cached_response
+def get_facets():
+    names = [name for name in request.args.get('facets', '').split(',') if name] or list(FACETS)
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ApiError(f"Unknown facet(s): {', '.join(unknown)}")
+
+    if any(request.args.get(name) for name in BOOK_FILTERS):
+        books = filter_books(Book.query)
+        values = {name: FACETS[name](books) for name in names}
+    else:
+        values = {name: facet_cache.get(name, g.cache_generation) for name in names}
+    return jsonify({name: facet_response(name, value) for name, value in values.items()})
 
 @app.route('/api/books', methods=['GET'])
+@cached_response
 def get_books():
-    books = Book.query.all()
-    return jsonify([book.to_dict() for book in books])
+    if request.args.get('ids'):
+        return get_books_by_id()
+    sort_keys = {
+        'id': Book.id,
+        'title': Book.title,
+        'created_at': Book.created_at,
+        'updated_at': Book.updated_at,
+    }
+    fields = book_fields()
+    sort = request.args.get('sort', 'id').lstrip('-')
+    query = filter_books(Book.query.options(*book_load_options(fields, sort if sort in sort_keys else 'id')))
+    books, next_cursor = paginate(query, Book, sort_keys)
+    return page_response([book.to_dict(fields) for book in books], next_cursor)
+
+def get_books_by_id():
+    try:
+        ids = list(dict.fromkeys(int(book_id) for book_id in request.args['ids'].split(',') if book_id.strip()))
+    except ValueError:
+        raise ApiError('ids must be a comma-separated list of integers')
+    if len(ids) > app.config['MAX_PAGE_SIZE']:
+        raise ApiError(f"At most {app.config['MAX_PAGE_SIZE']} ids can be requested at once")
+    fields = book_fields()
+    books = {
+        book.id: book
+        for book in Book.query.options(*book_load_options(fields)).filter(Book.id.in_(ids))
+    }
+    return jsonify([books[book_id].to_dict(fields) for book_id in ids if book_id in books])
+
+@app.route('/api/books/search', methods=['GET'])
+@cached_response
+def search_books():
+    if db.engine.dialect.name != 'sqlite':
+        raise ApiError('Full-text search requires SQLite FTS5', 501)
+    match = fts_query(request.args.get('q', ''))
+    if not match:
+        raise ApiError('q is required')
+
+    limit = page_limit()
+    after = request.args.get('after')
+    rank, last_id = decode_cursor(after) if after else (None, None)
+    params = {'match': match, 'limit': limit + 1, 'rank': rank, 'last_id': last_id}
+    # bm25 reads every match to weigh the query terms, so ranking a word
+    # found in much of the catalog is slow however few rows are returned.
+    # Queries with up to SEARCH_CANDIDATES matches are ranked; broader ones
+    # come back newest first. The cursor keeps the mode of its first page.
+    if after:
+        ranked = rank is not None
+    else:
+        probe = db.text('SELECT COUNT(*) FROM (SELECT 1 FROM book_fts WHERE book_fts MATCH :match LIMIT :candidates)')
+        candidates = app.config['SEARCH_CANDIDATES']
+        ranked = db.session.execute(probe, {'match': match, 'candidates': candidates + 1}).scalar() <= candidates
+    if ranked:
+        sql = 'SELECT rowid, rank FROM book_fts WHERE book_fts MATCH :match'
+        if after:
+            sql += ' AND (rank > :rank OR (rank = :rank AND rowid > :last_id))'
+        sql += ' ORDER BY rank, rowid LIMIT :limit'
+    else:
+        sql = 'SELECT rowid, NULL AS rank FROM book_fts WHERE book_fts MATCH :match'
+        if after:
+            sql += ' AND rowid < :last_id'
+        sql += ' ORDER BY rowid DESC LIMIT :limit'
+    hits = db.session.execute(db.text(sql), params).all()
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor([hits[-1].rank, hits[-1].rowid])
+
+    ids = [hit.rowid for hit in hits]
+    fields = book_fields()
+    books = {
+        book.id: book
+        for book in Book.query.options(*book_load_options(fields)).filter(Book.id.in_(ids))
+    }
+    return page_response([books[book_id].to_dict(fields) for book_id in ids if book_id in books], next_cursor)
 
 @app.route('/api/books/<int:book_id>', methods=['GET'])
+@cached_response
 def get_book(book_id):
-    book = Book.query.get_or_404(book_id)
-    return jsonify(book.to_dict())
+    fields = book_fields()
+    book = Book.query.options(*book_load_options(fields)).filter_by(id=book_id).first_or_404()
+    return jsonify(book.to_dict(fields))
+
+@app.route('/covers/<size>/<path:filename>', methods=['GET'])
+def get_cover(size, filename):
+    if size != 'original' and size not in app.config['THUMBNAIL_SIZES']:
+        raise ApiError('Unknown cover size', 404)
+    immutable = bool(CONTENT_ADDRESSED.match(filename))
+    directory = app.config['UPLOAD_FOLDER']
+    if size != 'original':
+        if os.path.exists(thumbnail_path(size, filename)):
+            directory = os.path.dirname(thumbnail_path(size, filename))
+        else:
+            # Not generated yet (or no Pillow): serve the original, but don't
+            # let clients pin it under the thumbnail URL.
+            immutable = False
+
+    response = send_from_directory(
+        os.path.abspath(directory), filename, max_age=COVER_CACHE_SECONDS if immutable else 60
+    )
+    response.cache_control.immutable = immutable or None
+    return response
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    if not change_feed_enabled():
+        raise ApiError('The change feed requires SQLite', 501)
+    since = int_arg('since', 0)
+    limit = page_limit()
+    # Read before the entries: AUTOINCREMENT keeps the highest id ever
+    # issued here, even once pruning has removed that row.
+    last = db.session.scalar(db.text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")) or 0
+    if since < 0 or since > last:
+        raise ApiError(f'since must be between 0 and {last}')
+    entries = (
+        ChangeLog.query.filter(ChangeLog.id > since)
+        .order_by(ChangeLog.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Ids up to `last` were all committed (a rolled back insert rolls the
+    # sequence back too), so a missing since + 1 can only have been pruned.
+    if since < last and (not entries or entries[0].id > since + 1):
+        raise ApiError('Cursor is older than the retained change history; resync from /api/export/books', 410)
+
+    # Only the latest action per entity matters to a client catching up.
+    latest = {(entry.entity, entry.entity_id): entry.action for entry in entries}
+    upserted = {'book': [], 'author': []}
+    deleted = {'book': [], 'author': []}
+    for (entity, entity_id), action in latest.items():
+        (deleted if action == 'delete' else upserted)[entity].append(entity_id)
+
+    books = Book.query.options(*book_load_options()).filter(Book.id.in_(upserted['book'])).all() if upserted['book'] else []
+    authors = Author.query.filter(Author.id.in_(upserted['author'])).all() if upserted['author'] else []
+    # Rows removed after this page's entries were written show up as deletes.
+    deleted['book'] += sorted(set(upserted['book']) - {book.id for book in books})
+    deleted['author'] += sorted(set(upserted['author']) - {author.id for author in authors})
+
+    return jsonify({
+        'books': [book.to_dict() for book in books],
+        'authors': [author.to_dict() for author in authors],
+        'deleted': {'books': deleted['book'], 'authors': deleted['author']},
+        'cursor': entries[-1].id if entries else since,
+        'has_more': has_more,
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(response_cache.stats())
 
 # Protected Routes
+@app.route('/api/export/books', methods=['GET'])
+@jwt_required()
+def export_books():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        raise ApiError(f"Invalid format '{fmt}', expected ndjson or json")
+    batch_size = min(max(int_arg('batch_size', app.config['EXPORT_BATCH_SIZE']), 1), 10000)
+    return app.response_class(
+        stream_with_context(iter_book_export(fmt, batch_size, book_fields())),
+        mimetype=EXPORT_MIMETYPES[fmt],
+    )
+
 @app.route('/api/books', methods=['POST'])
 @jwt_required()
 def create_book():
-    if 'cover_image' in request.files:
-        file = request.files['cover_image']
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-        else:
-            return jsonify({'error': 'Invalid image format'}), 400
-    else:
-        filename = None
-
+    publication_year = int_field(request.form, 'publication_year')
     title = request.form.get('title')
     author_id = request.form.get('author_id')
     if not title or not author_id:
@@ -199,80 +1719,146 @@ def create_book():
     if not author:
         return jsonify({'error': 'Author not found'}), 400
 
+    categories = request.form.get('categories')
+    try:
+        categories = category_links(json.loads(categories) if categories else [])
+    except ValueError:
+        return jsonify({'error': 'Invalid categories format'}), 400
+
+    # Store the cover only once the request is known to be valid, so a
+    # rejected create doesn't leave an orphan file behind.
+    if 'cover_image' in request.files:
+        file = request.files['cover_image']
+        if file and allowed_file(file.filename):
+            filename = store_cover(file)
+        else:
+            return jsonify({'error': 'Invalid image format'}), 400
+    else:
+        filename = None
+
     book = Book(
         title=title,
         isbn=request.form.get('isbn'),
-        publication_year=request.form.get('publication_year'),
+        publication_year=publication_year,
         pages=request.form.get('pages'),
         description=request.form.get('description'),
         author_id=author_id,
         cover_image=filename
     )
     db.session.add(book)
-    db.session.commit()
+    adjust_book_count(author.id, 1)
+    db.session.flush()
+    record_changes('book', [book.id])
+    deltas = facet_deltas()
+    deltas['authors'][author.id] += 1
+    deltas['decades'][year_decade(book.publication_year)] += 1
 
-    categories = request.form.get('categories')
-    if categories:
-        try:
-            categories_data = json.loads(categories)
-            for cat_data in categories_data:
-                db.session.add(BookCategory(
-                    book_id=book.id,
-                    category_id=cat_data['category_id'],
-                    priority=cat_data.get('priority', 1),
-                    notes=cat_data.get('notes')
-                ))
-        except Exception:
-            return jsonify({'error': 'Invalid categories format'}), 400
+    for category_id, cat_data in categories.items():
+        db.session.add(BookCategory(
+            book_id=book.id,
+            category_id=category_id,
+            priority=cat_data.get('priority', 1),
+            notes=cat_data.get('notes')
+        ))
+        deltas['categories'][category_id] += 1
 
+    generation = bump_generation()
     db.session.commit()
+    facet_cache.apply(generation, deltas)
     return jsonify(book.to_dict()), 201
 
+@app.route('/api/books/import', methods=['POST'])
+@jwt_required()
+def import_books():
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        raise ApiError(f"Invalid format '{fmt}', expected ndjson or csv")
+    mode = request.args.get('mode', 'insert')
+    if mode not in ('insert', 'upsert'):
+        raise ApiError(f"Invalid mode '{mode}', expected insert or upsert")
+
+    importer = BookImporter(upsert=mode == 'upsert', batch_size=int_arg('batch_size'))
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    return jsonify(importer.run(iter_import_rows(stream, fmt)))
+
 @app.route('/api/books/<int:book_id>', methods=['PUT'])
 @jwt_required()
 def update_book(book_id):
-    book = Book.query.get_or_404(book_id)
+    book = Book.query.options(selectinload(Book.book_categories)).filter_by(id=book_id).first_or_404()
     data = request.get_json()
+    if not isinstance(data, dict):
+        raise ApiError('Expected a JSON object')
+    deltas = facet_deltas()
+    apply_book_update(book, data, deltas)
+    for author_id, delta in deltas['authors'].items():
+        if delta:
+            adjust_book_count(author_id, delta)
 
-    if data.get('title'):
-        book.title = data['title']
-    if data.get('isbn'):
-        book.isbn = data['isbn']
-    if data.get('publication_year'):
-        book.publication_year = data['publication_year']
-    if data.get('pages'):
-        book.pages = data['pages']
-    if data.get('description'):
-        book.description = data['description']
-    if data.get('author_id'):
-        book.author_id = data['author_id']
-
-    if 'categories' in data:
-        BookCategory.query.filter_by(book_id=book.id).delete()
-        for cat_data in data['categories']:
-            db.session.add(BookCategory(
-                book_id=book.id,
-                category_id=cat_data['category_id'],
-                priority=cat_data.get('priority', 1),
-                notes=cat_data.get('notes')
-            ))
-
+    record_changes('book', [book.id])
+    generation = bump_generation()
     db.session.commit()
+    facet_cache.apply(generation, deltas)
     return jsonify(book.to_dict())
 
+@app.route('/api/books', methods=['PATCH'])
+@jwt_required()
+def bulk_update_books():
+    updates = request.get_json()
+    if not isinstance(updates, list) or not updates:
+        raise ApiError('Expected a non-empty JSON array of book updates')
+    if len(updates) > app.config['MAX_PAGE_SIZE']:
+        raise ApiError(f"At most {app.config['MAX_PAGE_SIZE']} books can be updated at once")
+    if not all(isinstance(data, dict) and type(data.get('id')) is int for data in updates):
+        raise ApiError('Every update needs an integer id')
+
+    ids = [data['id'] for data in updates]
+    if len(set(ids)) != len(ids):
+        raise ApiError('Each book can only be updated once per request')
+    query = Book.query.options(*book_load_options()).filter(Book.id.in_(ids))
+    books = {book.id: book for book in query}
+    missing = sorted(set(ids) - set(books))
+    if missing:
+        raise ApiError(f"Books not found: {', '.join(map(str, missing))}", 404)
+
+    deltas = facet_deltas()
+    for data in updates:
+        apply_book_update(books[data['id']], data, deltas)
+    for author_id, delta in deltas['authors'].items():
+        if delta:
+            adjust_book_count(author_id, delta)
+
+    record_changes('book', list(books))
+    generation = bump_generation()
+    db.session.commit()
+    facet_cache.apply(generation, deltas)
+    # The commit expired every book; reload them in one go rather than
+    # letting to_dict() lazy-load each one.
+    books = {book.id: book for book in query}
+    return jsonify([books[book_id].to_dict() for book_id in ids])
+
 @app.route('/api/books/<int:book_id>', methods=['DELETE'])
 @jwt_required()
 def delete_book(book_id):
     book = Book.query.get_or_404(book_id)
+    deltas = facet_deltas()
+    deltas['authors'][book.author_id] -= 1
+    deltas['decades'][year_decade(book.publication_year)] -= 1
+    for (category_id,) in db.session.query(BookCategory.category_id).filter_by(book_id=book.id):
+        deltas['categories'][category_id] -= 1
+
     BookCategory.query.filter_by(book_id=book.id).delete()
+    adjust_book_count(book.author_id, -1)
+    record_changes('book', [book.id], 'delete')
     db.session.delete(book)
+    generation = bump_generation()
     db.session.commit()
+    facet_cache.apply(generation, deltas)
     return jsonify({'message': 'Book deleted successfully'})
 
 def create_tables():
     db.create_all()
     if User.query.count() == 0:
-        db.session.add(User(username='admin', password_hash=generate_password_hash('admin123')))
+        db.session.add(User(username='admin', password_hash=generate_password_hash('admin123', app.config['PASSWORD_HASH_METHOD'])))
     if Author.query.count() == 0:
         authors = [
             Author(name="Jane Austen", email="jane@example.com", birth_year=1775),
@@ -288,6 +1874,172 @@ def create_tables():
         db.session.bulk_save_objects(authors + categories)
     db.session.commit()
 
+@app.cli.command('check-book-counts')
+@click.option('--fix', is_flag=True, help='Rewrite mismatched counters.')
+def check_book_counts(fix):
+    """Compare author.book_count against the actual number of books."""
+    actual = (
+        db.select(db.func.count(Book.id))
+        .where(Book.author_id == Author.id)
+        .correlate(Author)
+        .scalar_subquery()
+    )
+    mismatches = db.session.execute(
+        db.select(Author.id, Author.name, Author.book_count, actual).where(Author.book_count != actual)
+    ).all()
+
+    for author_id, name, stored, counted in mismatches:
+        click.echo(f'author {author_id} ({name}): stored {stored}, actual {counted}')
+    if not mismatches:
+        click.echo('All author book counts are consistent.')
+        return
+    if fix:
+        db.session.execute(db.update(Author).values(book_count=actual))
+        bump_generation()
+        db.session.commit()
+        click.echo(f'Fixed {len(mismatches)} author(s).')
+    else:
+        raise SystemExit(1)
+
+SYNTHETIC_WORDS = (
+    'shadow river winter garden silent empire glass storm letter night house city '
+    'forgotten crown iron ocean last secret summer stone wolf paper light journey '
+    'broken kingdom song fire hollow distant golden memory orchard island'
+).split()
+
+@app.cli.command('generate-data')
+@click.option('--users', type=int, default=100)
+@click.option('--authors', type=int, default=1000)
+@click.option('--categories', type=int, default=50)
+@click.option('--books', type=int, default=100000)
+@click.option('--links-per-book', type=int, default=2, help='Maximum categories per book.')
+@click.option('--batch-size', type=int, default=None)
+@click.option('--seed', type=int, default=0)
+def generate_data(users, authors, categories, books, links_per_book, batch_size, seed):
+    """Fill the database with synthetic users, authors, categories and books."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    batch_size = batch_size or app.config['IMPORT_BATCH_SIZE']
+    run_id = f'{seed}-{int(now.timestamp())}'
+
+    def insert_in_batches(table, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                db.session.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(table.insert(), batch)
+        bump_generation()
+        db.session.commit()
+
+    # Every synthetic user shares one hash (password: 'password').
+    password_hash = generate_password_hash('password', app.config['PASSWORD_HASH_METHOD'])
+    insert_in_batches(User.__table__, (
+        {'username': f'user-{run_id}-{i}', 'password_hash': password_hash, 'created_at': now}
+        for i in range(users)
+    ))
+    insert_in_batches(Author.__table__, (
+        {'name': f'{rng.choice(SYNTHETIC_WORDS).title()} {rng.choice(SYNTHETIC_WORDS).title()} {i}',
+         'birth_year': rng.randint(1700, 2000), 'created_at': now, 'book_count': 0}
+        for i in range(authors)
+    ))
+    insert_in_batches(Category.__table__, (
+        {'name': f'Category {run_id}-{i}', 'created_at': now}
+        for i in range(categories)
+    ))
+
+    author_ids = db.session.scalars(db.select(Author.id)).all()
+    category_ids = db.session.scalars(db.select(Category.id)).all()
+    if not author_ids:
+        raise click.ClickException('Books need at least one author')
+
+    def book_rows():
+        for i in range(books):
+            title = ' '.join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(1, 5))).title()
+            yield i + 1, {
+                'title': title,
+                'isbn': f'{run_id}-{i}',
+                'publication_year': rng.randint(1800, 2025),
+                'pages': rng.randint(40, 1200),
+                'description': ' '.join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(0, 40))),
+                'author_id': rng.choice(author_ids),
+                'categories': rng.sample(category_ids, min(len(category_ids), rng.randint(0, links_per_book))),
+            }
+
+    report = BookImporter(batch_size=batch_size).run(book_rows())
+    click.echo(
+        f"Created {users} users, {authors} authors, {categories} categories "
+        f"and {report['inserted']} books."
+    )
+    if report['failed']:
+        raise click.ClickException(f"{report['failed']} book(s) failed: {report['errors'][:5]}")
+
+@app.cli.command('prune-changes')
+@click.option('--keep-days', type=int, default=30, show_default=True)
+def prune_changes(keep_days):
+    """Drop change feed entries older than --keep-days."""
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    deleted = db.session.execute(db.delete(ChangeLog).where(ChangeLog.changed_at < cutoff)).rowcount
+    db.session.commit()
+    click.echo(f'Pruned {deleted} change(s).')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Repopulate the book_fts full-text index from the book table."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        raise click.ClickException('Full-text search requires SQLite FTS5')
+    # Recreated rather than emptied so index options from SEARCH_INDEX_DDL apply.
+    connection.exec_driver_sql('DROP TABLE IF EXISTS book_fts')
+    for statement in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql(
+        'INSERT INTO book_fts(rowid, title, description, author_name) '
+        'SELECT book.id, book.title, book.description, author.name '
+        'FROM book JOIN author ON author.id = book.author_id'
+    )
+    connection.exec_driver_sql("INSERT INTO book_fts(book_fts) VALUES('optimize')")
+    bump_generation()
+    db.session.commit()
+    count = db.session.execute(db.text('SELECT COUNT(*) FROM book_fts')).scalar()
+    click.echo(f'Indexed {count} book(s).')
+
+@app.cli.command('generate-thumbnails')
+def generate_thumbnails_command():
+    """Create any missing cover thumbnails."""
+    if Image is None:
+        raise click.ClickException('Thumbnail generation requires Pillow')
+    covers = db.session.scalars(db.select(Book.cover_image).where(Book.cover_image.isnot(None)).distinct())
+    for filename in covers:
+        if os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename)):
+            generate_thumbnails(filename)
+    click.echo('Thumbnails are up to date.')
+
+@app.cli.command('export-books')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_MIMETYPES)), default='ndjson')
+@click.option('--batch-size', type=int, default=lambda: app.config['EXPORT_BATCH_SIZE'])
+@click.option('--output', type=click.File('w'), default='-')
+def export_books_command(fmt, batch_size, output):
+    """Stream every book, with author and categories inlined."""
+    for chunk in iter_book_export(fmt, batch_size):
+        output.write(chunk)
+
+@app.cli.command('import-books')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default=None,
+              help='Defaults to csv for .csv files, ndjson otherwise.')
+@click.option('--upsert', is_flag=True, help='Update existing books matched by ISBN.')
+@click.option('--batch-size', type=int, default=None)
+def import_books_command(source, fmt, upsert, batch_size):
+    """Bulk-load books from an NDJSON or CSV file ('-' for stdin)."""
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'ndjson')
+    report = BookImporter(upsert=upsert, batch_size=batch_size).run(iter_import_rows(source, fmt))
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(f"Inserted {report['inserted']}, updated {report['updated']}, failed {report['failed']}.")
+
 if __name__ == '__main__':
     with app.app_context():
         create_tables()
@@ -0,0 +1,52 @@
+"""Small stdlib HTTP helpers shared by the benchmark scripts."""
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+
+def request(base_url, path, payload=None, method=None, headers=None, body=None, content_type=None):
+    headers = dict(headers or {})
+    if payload is not None:
+        body = json.dumps(payload).encode()
+        content_type = 'application/json'
+    if content_type:
+        headers['Content-Type'] = content_type
+    req = urllib.request.Request(base_url + path, data=body, headers=headers, method=method)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            data = response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        data = error.read()
+        status = error.code
+    except urllib.error.URLError:
+        data = b''
+        status = 0
+    return status, time.perf_counter() - start, data
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def login(base_url, username, password):
+    status, _, data = request(base_url, '/api/login', {'username': username, 'password': password})
+    if status != 200:
+        raise SystemExit(f'login as {username!r} failed with HTTP {status}')
+    return {'Authorization': 'Bearer ' + json.loads(data)['access_token']}
+
+
+def multipart(fields):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in fields.items()
+    ]
+    body = (''.join(parts) + f'--{boundary}--\r\n').encode()
+    return body, f'multipart/form-data; boundary={boundary}'
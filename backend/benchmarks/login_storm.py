@@ -0,0 +1,94 @@
+"""Measure read-route latency while the server is hit by a login storm.
+
+Run the API (e.g. ``gunicorn -w 4 --threads 8 app:app``) and then:
+
+    python benchmarks/login_storm.py --base-url http://localhost:8000
+
+The script first samples GET latency on its own, then again while
+``--storm`` clients hammer /api/login. The storm runs in ``--processes``
+separate processes so its client threads don't compete with the sampler
+for this process's GIL. With hashing off the request workers and at the
+lowest CPU priority, the read p99 should stay close to the baseline. Run
+the storm from another machine when the server has few cores: on a
+single core the storm clients themselves compete with the server for CPU.
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+
+from common import percentile, request
+
+
+def sample_reads(base_url, path, seconds):
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        latencies.append(request(base_url, path)[1])
+    return latencies
+
+
+def storm(args, threads, stop, results):
+    statuses = {}
+    lock = threading.Lock()
+    credentials = {'username': args.username, 'password': args.password}
+
+    def login():
+        while not stop.is_set():
+            status, _, _ = request(args.base_url, '/api/login', credentials)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    workers = [threading.Thread(target=login) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(statuses)
+
+
+def summarize(label, latencies):
+    print(f'{label:>10}: n={len(latencies):5d}  '
+          f'p50={percentile(latencies, 50) * 1000:7.1f}ms  '
+          f'p95={percentile(latencies, 95) * 1000:7.1f}ms  '
+          f'p99={percentile(latencies, 99) * 1000:7.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--read-path', default='/api/books?limit=20')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--storm', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--processes', type=int, default=4, help='processes the storm clients are spread over')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    summarize('baseline', sample_reads(args.base_url, args.read_path, args.seconds))
+
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    per_process = -(-args.storm // args.processes)
+    processes = [
+        multiprocessing.Process(target=storm, args=(args, per_process, stop, results), daemon=True)
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        time.sleep(1)  # let the storm ramp up before sampling
+        summarize('storm', sample_reads(args.base_url, args.read_path, args.seconds))
+    finally:
+        stop.set()
+    statuses = {}
+    for _ in processes:
+        for code, count in results.get().items():
+            statuses[code] = statuses.get(code, 0) + count
+    for process in processes:
+        process.join()
+    print('login responses:', ', '.join(f'{code}: {count}' for code, count in sorted(statuses.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Drive every API route at a fixed concurrency and report latency.
+
+Fill a database first (``flask generate-data --books 1000000``), start the
+API, then:
+
+    python benchmarks/run.py --base-url http://localhost:8000 --output results.json
+
+Pass ``--baseline`` with an earlier results file to fail (exit status 1)
+when any route's p99 or throughput regresses by more than ``--tolerance``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from common import login, multipart, percentile, request
+
+ROUTES = [
+    'list', 'list_sparse', 'list_filtered', 'detail', 'search', 'authors', 'categories',
+    'facets', 'facets_filtered', 'login', 'create', 'update', 'delete',
+]
+
+
+class Target:
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url
+        self.credentials = {'username': username, 'password': password}
+        self.auth = login(base_url, username, password)
+        self.created = []
+        self.lock = threading.Lock()
+
+        first = self.get_json('/api/books?limit=1')
+        last = self.get_json('/api/books?limit=1&sort=-id')
+        if not first:
+            raise SystemExit('The catalog is empty; run `flask generate-data` first.')
+        self.min_id, self.max_id = first[0]['id'], last[0]['id']
+        self.author_ids = [author['id'] for author in self.get_json('/api/authors?limit=500')]
+        self.search_terms = [word for word in first[0]['title'].split() if len(word) > 2] or ['a']
+
+    def get_json(self, path):
+        status, _, data = request(self.base_url, path)
+        if status != 200:
+            raise SystemExit(f'GET {path} failed with HTTP {status}')
+        return json.loads(data)
+
+    def call(self, route, rng):
+        if route == 'list':
+            return request(self.base_url, '/api/books?limit=50')
+        if route == 'list_sparse':
+            return request(self.base_url, '/api/books?limit=50&fields=title,author_name,publication_year')
+        if route == 'list_filtered':
+            year = rng.randint(1800, 2020)
+            return request(self.base_url, f'/api/books?author_id={rng.choice(self.author_ids)}'
+                                          f'&year_from={year}&year_to={year + 5}')
+        if route == 'detail':
+            return request(self.base_url, f'/api/books/{rng.randint(self.min_id, self.max_id)}')
+        if route == 'search':
+            return request(self.base_url, f'/api/books/search?q={rng.choice(self.search_terms)}*')
+        if route == 'authors':
+            return request(self.base_url, '/api/authors?limit=50')
+        if route == 'categories':
+            return request(self.base_url, '/api/categories?limit=50')
+        if route == 'facets':
+            return request(self.base_url, '/api/stats/facets')
+        if route == 'facets_filtered':
+            return request(self.base_url, f'/api/stats/facets?author_id={rng.choice(self.author_ids)}')
+        if route == 'login':
+            return request(self.base_url, '/api/login', self.credentials)
+        if route == 'create':
+            body, content_type = multipart({
+                'title': f'Benchmark {uuid.uuid4().hex[:8]}',
+                'author_id': rng.choice(self.author_ids),
+                'publication_year': rng.randint(1800, 2020),
+            })
+            status, latency, data = request(self.base_url, '/api/books', method='POST', headers=self.auth,
+                                            body=body, content_type=content_type)
+            if status == 201:
+                with self.lock:
+                    self.created.append(json.loads(data)['id'])
+            return status, latency, data
+        if route == 'update':
+            with self.lock:
+                book_id = rng.choice(self.created) if self.created else self.min_id
+            return request(self.base_url, f'/api/books/{book_id}', {'title': f'Updated {rng.random()}'},
+                           method='PUT', headers=self.auth)
+        if route == 'delete':
+            with self.lock:
+                book_id = self.created.pop() if self.created else None
+            if book_id is None:
+                return None
+            return request(self.base_url, f'/api/books/{book_id}', method='DELETE', headers=self.auth)
+        raise ValueError(route)
+
+
+def run_route(target, route, requests, concurrency, seed):
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def one(i):
+        result = target.call(route, random.Random(seed * 1_000_003 + i))
+        if result is None:
+            return
+        status, latency, _ = result
+        with lock:
+            latencies.append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for route, current in results['routes'].items():
+        previous = baseline.get('routes', {}).get(route)
+        if not previous:
+            continue
+        if previous['p99_ms'] and current['p99_ms'] > previous['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{route}: p99 {previous['p99_ms']}ms -> {current['p99_ms']}ms")
+        if previous['throughput'] and current['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {previous['throughput']}/s -> {current['throughput']}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--routes', default=','.join(ROUTES), help='comma-separated subset of: ' + ', '.join(ROUTES))
+    parser.add_argument('--requests', type=int, default=500, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed regression, as a fraction')
+    args = parser.parse_args()
+
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown route(s): {', '.join(sorted(unknown))}")
+
+    target = Target(args.base_url, args.username, args.password)
+    results = {
+        'base_url': args.base_url,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'routes': {},
+    }
+
+    print(f"{'route':<14}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route in routes:
+        stats = run_route(target, route, args.requests, args.concurrency, args.seed)
+        results['routes'][route] = stats
+        print(f"{route:<14}{stats['requests']:>7}{stats['errors']:>8}{stats['throughput']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Measure read latency while the server is committing writes.
+
+Run the API against a filled database and then:
+
+    python benchmarks/write_contention.py --base-url http://localhost:8000
+
+The script samples GET /api/books/<random id> on its own, then again while
+``--writers`` threads create books. Under the rollback journal every commit
+locks readers out; with WAL (the default SQLITE_JOURNAL_MODE) the read p99
+under writes should stay close to the baseline and no read should fail.
+Start the server with SQLITE_JOURNAL_MODE=DELETE to reproduce the old
+behaviour for comparison.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+
+from common import login, multipart, percentile, request
+
+
+def sample_reads(base_url, ids, readers, seconds):
+    latencies, failures = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def read(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            status, latency, _ = request(base_url, f'/api/books/{rng.randint(*ids)}')
+            with lock:
+                (latencies if status in (200, 404) else failures).append(latency)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures
+
+
+def summarize(label, latencies, failures):
+    print(f'{label:>10}: n={len(latencies):5d}  failed={len(failures):4d}  '
+          f'p50={percentile(latencies, 50) * 1000:7.1f}ms  '
+          f'p99={percentile(latencies, 99) * 1000:7.1f}ms  '
+          f'max={max(latencies, default=0) * 1000:7.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--readers', type=int, default=8, help='concurrent read threads')
+    parser.add_argument('--writers', type=int, default=4, help='concurrent write threads')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    auth = login(args.base_url, args.username, args.password)
+    first = json.loads(request(args.base_url, '/api/books?limit=1')[2])
+    last = json.loads(request(args.base_url, '/api/books?limit=1&sort=-id')[2])
+    if not first:
+        raise SystemExit('The catalog is empty; run `flask generate-data` first.')
+    ids = (first[0]['id'], last[0]['id'])
+    author_id = first[0]['author_id']
+
+    summarize('baseline', *sample_reads(args.base_url, ids, args.readers, args.seconds))
+
+    stop = threading.Event()
+    statuses = {}
+    lock = threading.Lock()
+
+    def write():
+        while not stop.is_set():
+            body, content_type = multipart({'title': f'Contention {uuid.uuid4().hex[:8]}', 'author_id': author_id})
+            status, _, _ = request(args.base_url, '/api/books', method='POST', headers=auth,
+                                   body=body, content_type=content_type)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=write, daemon=True) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    try:
+        summarize('writes', *sample_reads(args.base_url, ids, args.readers, args.seconds))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    print('write responses:', ', '.join(f'{code}: {count}' for code, count in sorted(statuses.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""add author book_count
+
+Revision ID: 16e956b4cfa7
+Revises: ee5186e13050
+Create Date: 2026-10-16 09:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '16e956b4cfa7'
+down_revision = 'ee5186e13050'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('author', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('book_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        'UPDATE author SET book_count = '
+        '(SELECT COUNT(*) FROM book WHERE book.author_id = author.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('author', schema=None) as batch_op:
+        batch_op.drop_column('book_count')
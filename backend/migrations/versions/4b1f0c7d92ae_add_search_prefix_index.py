@@ -0,0 +1,44 @@
+"""add search prefix index
+
+Revision ID: 4b1f0c7d92ae
+Revises: dca63ec63012
+Create Date: 2026-10-17 14:20:05.913377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1f0c7d92ae'
+down_revision = 'dca63ec63012'
+branch_labels = None
+depends_on = None
+
+
+def rebuild_book_fts(options):
+    # FTS5 options can't be altered in place; the triggers on book and
+    # author refer to the table by name and keep working once it's back.
+    op.execute('DROP TABLE IF EXISTS book_fts')
+    op.execute(
+        "CREATE VIRTUAL TABLE book_fts USING fts5("
+        f"title, description, author_name, tokenize='unicode61 remove_diacritics 2'{options})"
+    )
+    op.execute("INSERT INTO book_fts(book_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 5.0)')")
+    op.execute(
+        "INSERT INTO book_fts(rowid, title, description, author_name) "
+        "SELECT book.id, book.title, book.description, author.name "
+        "FROM book JOIN author ON author.id = book.author_id"
+    )
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    rebuild_book_fts(", prefix='2 3'")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    rebuild_book_fts('')
@@ -0,0 +1,48 @@
+"""add change log
+
+Revision ID: 71bd7066b702
+Revises: b7f07d3c827a
+Create Date: 2026-10-16 13:22:50.917364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71bd7066b702'
+down_revision = 'b7f07d3c827a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_change_log_changed_at'), ['changed_at'], unique=False)
+
+    # Seed the feed with the current catalog so a sync from cursor 0 sees
+    # every existing author and book.
+    op.execute(
+        "INSERT INTO change_log (entity, entity_id, action, changed_at) "
+        "SELECT 'author', id, 'upsert', created_at FROM author ORDER BY id"
+    )
+    op.execute(
+        "INSERT INTO change_log (entity, entity_id, action, changed_at) "
+        "SELECT 'book', id, 'upsert', updated_at FROM book ORDER BY id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_change_log_changed_at'))
+
+    op.drop_table('change_log')
@@ -0,0 +1,67 @@
+"""add book full-text search
+
+Revision ID: 9e7cb3156fe3
+Revises: 16e956b4cfa7
+Create Date: 2026-10-16 10:03:17.552041
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e7cb3156fe3'
+down_revision = '16e956b4cfa7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5("
+        "title, description, author_name, tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute("INSERT INTO book_fts(book_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 5.0)')")
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN "
+        "INSERT INTO book_fts(rowid, title, description, author_name) "
+        "SELECT new.id, new.title, new.description, (SELECT name FROM author WHERE id = new.author_id); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, description, author_id ON book BEGIN "
+        "DELETE FROM book_fts WHERE rowid = old.id; "
+        "INSERT INTO book_fts(rowid, title, description, author_name) "
+        "SELECT new.id, new.title, new.description, (SELECT name FROM author WHERE id = new.author_id); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN "
+        "DELETE FROM book_fts WHERE rowid = old.id; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS author_fts_au AFTER UPDATE OF name ON author BEGIN "
+        "UPDATE book_fts SET author_name = new.name "
+        "WHERE rowid IN (SELECT id FROM book WHERE author_id = new.id); "
+        "END"
+    )
+    op.execute(
+        "INSERT INTO book_fts(rowid, title, description, author_name) "
+        "SELECT book.id, book.title, book.description, author.name "
+        "FROM book JOIN author ON author.id = book.author_id"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS author_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS book_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS book_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS book_fts_ai')
+    op.execute('DROP TABLE IF EXISTS book_fts')
@@ -0,0 +1,46 @@
+"""add secondary indexes
+
+Revision ID: b7f07d3c827a
+Revises: 9e7cb3156fe3
+Create Date: 2026-10-16 11:41:05.204718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f07d3c827a'
+down_revision = '9e7cb3156fe3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('author', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_author_name'), ['name'], unique=False)
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_book_author_id'), ['author_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_book_isbn'), ['isbn'], unique=False)
+        batch_op.create_index(batch_op.f('ix_book_publication_year'), ['publication_year'], unique=False)
+        batch_op.create_index(batch_op.f('ix_book_title'), ['title'], unique=False)
+        batch_op.create_index(batch_op.f('ix_book_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('book_category', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_book_category_category_id'), ['category_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('book_category', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_book_category_category_id'))
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_book_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_book_title'))
+        batch_op.drop_index(batch_op.f('ix_book_publication_year'))
+        batch_op.drop_index(batch_op.f('ix_book_isbn'))
+        batch_op.drop_index(batch_op.f('ix_book_author_id'))
+
+    with op.batch_alter_table('author', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_author_name'))
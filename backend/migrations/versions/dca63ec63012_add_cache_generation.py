@@ -0,0 +1,29 @@
+"""add cache generation
+
+Revision ID: dca63ec63012
+Revises: 71bd7066b702
+Create Date: 2026-10-17 09:12:41.208533
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dca63ec63012'
+down_revision = '71bd7066b702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = op.create_table('cache_generation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(cache_generation, [{'id': 1, 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('cache_generation')
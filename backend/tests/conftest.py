@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+# app.py reads its configuration at import time, so point it at a scratch
+# database before importing it.
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DATABASE_PATH
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-long-enough-for-hs256')
+
+from app import Author, Book, BookCategory, Category, User, app as flask_app, create_tables, db, facet_cache, response_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.session.execute(db.text('DROP TABLE IF EXISTS book_fts'))
+        db.session.commit()
+        create_tables()
+        response_cache.clear()
+        facet_cache.clear()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    admin = User.query.filter_by(username='admin').one()
+    return {'Authorization': f'Bearer {create_access_token(identity=admin.id)}'}
+
+
+@pytest.fixture
+def add_books(app):
+    def add(count):
+        authors = Author.query.all()
+        categories = Category.query.all()
+        for i in range(count):
+            book = Book(title=f'Book {i}', author_id=authors[i % len(authors)].id, publication_year=1900 + i)
+            db.session.add(book)
+            db.session.flush()
+            for category in categories[:i % len(categories) + 1]:
+                db.session.add(BookCategory(book_id=book.id, category_id=category.id))
+        db.session.commit()
+    return add
+
+
+@pytest.fixture
+def write_elsewhere(app):
+    # What another worker or a CLI command does: change rows and bump the
+    # shared generation in the same transaction, without touching this
+    # process's caches.
+    def write(sql):
+        db.session.execute(db.text(sql))
+        db.session.execute(db.text('UPDATE cache_generation SET value = value + 1 WHERE id = 1'))
+        db.session.commit()
+    return write
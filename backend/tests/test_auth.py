@@ -0,0 +1,60 @@
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import ApiError, PasswordHasher, User, db, password_hasher
+
+
+def test_needs_rehash_compares_the_method_prefix():
+    current = password_hasher.method
+    assert not password_hasher.needs_rehash(f'{current}$salt$digest')
+    assert password_hasher.needs_rehash('pbkdf2:sha256:1000$salt$digest')
+    assert password_hasher.needs_rehash('scrypt:32768:8:1$salt$digest')
+
+
+def test_login_upgrades_an_outdated_hash(client):
+    db.session.add(User(username='reader', password_hash=generate_password_hash('secret', 'pbkdf2:sha256:1000')))
+    db.session.commit()
+
+    response = client.post('/api/login', json={'username': 'reader', 'password': 'secret'})
+    assert response.status_code == 200
+    db.session.expire_all()
+    user = User.query.filter_by(username='reader').one()
+    assert not password_hasher.needs_rehash(user.password_hash)
+    assert user.check_password('secret')
+
+
+def test_hasher_replaces_a_broken_pool():
+    hasher = PasswordHasher('pbkdf2:sha256:1000', 1, 2)
+    assert check_password_hash(hasher.hash('secret'), 'secret')
+    pool = hasher._pool
+    assert pool._mp_context.get_start_method() != 'fork'
+
+    for process in list(pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+    assert hasher.verify(hasher.hash('secret'), 'secret')
+    assert hasher._pool is not pool
+    hasher._pool.shutdown()
+
+
+def test_hasher_gives_up_when_the_pool_keeps_breaking(monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool()
+
+        def shutdown(self, wait=True):
+            pass
+
+    hasher = PasswordHasher('pbkdf2:sha256:1000', 1, 2)
+    monkeypatch.setattr(hasher, '_get_pool', BrokenPool)
+    with pytest.raises(ApiError) as error:
+        hasher.hash('secret')
+    assert error.value.status == 503
+    # The slot is released, so the next request isn't turned away with a 429.
+    with pytest.raises(ApiError) as error:
+        hasher.hash('secret')
+    assert error.value.status == 503
@@ -0,0 +1,73 @@
+import json
+
+from app import Author, Book, db
+
+
+def stored_counts():
+    db.session.expire_all()
+    return {author.id: author.book_count for author in Author.query}
+
+
+def actual_counts():
+    counts = {author.id: 0 for author in Author.query}
+    for book in Book.query:
+        counts[book.author_id] += 1
+    return counts
+
+
+def check_book_counts(app, *args):
+    return app.test_cli_runner().invoke(args=['check-book-counts', *args])
+
+
+def test_every_write_path_keeps_book_count(app, client, auth_headers, tmp_path):
+    def create(title, author_id):
+        response = client.post('/api/books', data={'title': title, 'author_id': author_id}, headers=auth_headers)
+        assert response.status_code == 201
+        return response.get_json()['id']
+
+    first, second, third = create('One', 1), create('Two', 1), create('Three', 2)
+    assert client.put(f'/api/books/{first}', json={'author_id': 3}, headers=auth_headers).status_code == 200
+    response = client.patch('/api/books', json=[{'id': second, 'author_id': 2}, {'id': third, 'author_id': 3}],
+                            headers=auth_headers)
+    assert response.status_code == 200
+    assert client.delete(f'/api/books/{first}', headers=auth_headers).status_code == 200
+
+    rows = [
+        {'title': 'Imported', 'author': 'Jane Austen', 'isbn': '111'},
+        {'title': 'New author', 'author': 'Ursula K. Le Guin', 'isbn': '222'},
+    ]
+    body = '\n'.join(json.dumps(row) for row in rows)
+    response = client.post('/api/books/import', data=body, content_type='application/x-ndjson', headers=auth_headers)
+    assert response.get_json()['inserted'] == 2
+    # An upsert that moves a book to another author.
+    moved = json.dumps({'title': 'Imported', 'author': 'George Orwell', 'isbn': '111'})
+    response = client.post('/api/books/import?mode=upsert', data=moved, content_type='application/x-ndjson',
+                           headers=auth_headers)
+    assert response.get_json()['updated'] == 1
+
+    source = tmp_path / 'books.csv'
+    source.write_text('title,author,isbn\nFrom CLI,J.K. Rowling,333\n')
+    assert app.test_cli_runner().invoke(args=['import-books', str(source)]).exit_code == 0
+
+    assert stored_counts() == actual_counts()
+    result = check_book_counts(app)
+    assert result.exit_code == 0
+    assert 'consistent' in result.output
+
+
+def test_check_book_counts_reports_and_fixes_drift(app, client, auth_headers):
+    client.post('/api/books', data={'title': 'One', 'author_id': 1}, headers=auth_headers)
+    db.session.execute(db.update(Author).where(Author.id == 1).values(book_count=5))
+    db.session.execute(db.update(Author).where(Author.id == 2).values(book_count=-1))
+    db.session.commit()
+
+    result = check_book_counts(app)
+    assert result.exit_code == 1
+    assert 'author 1 (Jane Austen): stored 5, actual 1' in result.output
+    assert 'author 2 (George Orwell): stored -1, actual 0' in result.output
+
+    result = check_book_counts(app, '--fix')
+    assert result.exit_code == 0
+    assert 'Fixed 2 author(s).' in result.output
+    assert stored_counts() == actual_counts()
+    assert check_book_counts(app).exit_code == 0
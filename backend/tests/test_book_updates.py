@@ -0,0 +1,77 @@
+import pytest
+
+from app import Book, BookCategory, db
+
+
+def links(book_id):
+    db.session.expire_all()
+    return {
+        link.category_id: (link.id, link.assigned_at, link.priority, link.notes)
+        for link in BookCategory.query.filter_by(book_id=book_id)
+    }
+
+
+def test_category_sync_keeps_unchanged_links(client, add_books, auth_headers):
+    add_books(3)
+    before = links(3)
+    assert sorted(before) == [1, 2, 3]
+
+    categories = [
+        {'category_id': 1},
+        {'category_id': 2, 'priority': 5, 'notes': 'Mostly'},
+        {'category_id': 4},
+    ]
+    response = client.put('/api/books/3', json={'categories': categories}, headers=auth_headers)
+    assert response.status_code == 200
+    after = links(3)
+    assert sorted(after) == [1, 2, 4]
+    # Same rows, same assigned_at; the second one updated in place.
+    assert after[1] == before[1]
+    assert after[2][:2] == before[2][:2]
+    assert after[2][2:] == (5, 'Mostly')
+    assert after[4][0] not in {row[0] for row in before.values()}
+
+
+def test_author_must_exist(client, add_books, auth_headers):
+    add_books(1)
+    response = client.put('/api/books/1', json={'author_id': 99, 'title': 'Moved'}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Author not found'}
+    book = db.session.get(Book, 1)
+    db.session.refresh(book)
+    assert (book.author_id, book.title) == (1, 'Book 0')
+
+
+@pytest.mark.parametrize('data', [
+    {'author_id': 99},
+    {'author_id': 'two'},
+    {'author_id': [2]},
+    {'categories': [{'category_id': 'x'}]},
+    {'categories': [{'priority': 2}]},
+    {'categories': [1, 2]},
+    {'categories': 'fiction'},
+    {'categories': None},
+])
+def test_malformed_updates_are_rejected(client, add_books, auth_headers, data):
+    add_books(2)
+    assert client.put('/api/books/1', json=data, headers=auth_headers).status_code == 400
+    response = client.patch('/api/books', json=[{'id': 2, 'title': 'Renamed'}, {'id': 1, **data}], headers=auth_headers)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    # Nothing from the rejected batch is written.
+    db.session.expire_all()
+    assert db.session.get(Book, 2).title == 'Book 1'
+    assert sorted(links(1)) == [1]
+
+
+@pytest.mark.parametrize('book_id', [True, '1', 1.0, None])
+def test_bulk_update_ids_must_be_integers(client, add_books, auth_headers, book_id):
+    add_books(1)
+    response = client.patch('/api/books', json=[{'id': book_id, 'title': 'Renamed'}], headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Every update needs an integer id'}
+
+
+def test_update_needs_a_json_object(client, add_books, auth_headers):
+    add_books(1)
+    assert client.put('/api/books/1', json=[{'title': 'Renamed'}], headers=auth_headers).status_code == 400
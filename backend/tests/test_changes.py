@@ -0,0 +1,97 @@
+from app import ChangeLog, db
+
+
+def changes(client, since=0, **args):
+    response = client.get('/api/changes', query_string={'since': since, **args})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def create(client, auth_headers, title='Feed', author_id=1):
+    response = client.post('/api/books', data={'title': title, 'author_id': author_id}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_repeated_edits_collapse_to_the_current_row(client, auth_headers):
+    start = changes(client)['cursor']
+    book_id = create(client, auth_headers)
+    for title in ('Second', 'Third'):
+        assert client.put(f'/api/books/{book_id}', json={'title': title}, headers=auth_headers).status_code == 200
+
+    feed = changes(client, start)
+    assert [(book['id'], book['title']) for book in feed['books']] == [(book_id, 'Third')]
+    assert [author['id'] for author in feed['authors']] == [1]
+    assert feed['deleted'] == {'books': [], 'authors': []}
+    assert changes(client, feed['cursor']) == {
+        'books': [], 'authors': [], 'deleted': {'books': [], 'authors': []},
+        'cursor': feed['cursor'], 'has_more': False,
+    }
+
+
+def test_deleted_rows_come_back_as_tombstones(client, auth_headers):
+    start = changes(client)['cursor']
+    kept, removed = create(client, auth_headers, 'Kept'), create(client, auth_headers, 'Removed')
+    midway = changes(client)['cursor']
+    assert client.delete(f'/api/books/{removed}', headers=auth_headers).status_code == 200
+
+    feed = changes(client, start)
+    assert [book['id'] for book in feed['books']] == [kept]
+    assert feed['deleted']['books'] == [removed]
+
+    # A page that only holds the upsert still reports the row as gone.
+    db.session.execute(db.delete(ChangeLog).where(ChangeLog.id > midway))
+    db.session.commit()
+    assert changes(client, start)['deleted']['books'] == [removed]
+
+
+def test_has_more_pages_through_the_feed(client, auth_headers):
+    start = changes(client)['cursor']
+    ids = [create(client, auth_headers, f'Book {i}', author_id=1) for i in range(3)]
+    total = ChangeLog.query.filter(ChangeLog.id > start).count()
+
+    seen, cursor, pages = [], start, 0
+    while True:
+        feed = changes(client, cursor, limit=2)
+        seen += [book['id'] for book in feed['books']]
+        cursor, pages = feed['cursor'], pages + 1
+        if not feed['has_more']:
+            break
+    assert sorted(set(seen)) == ids
+    assert pages == (total + 1) // 2
+
+
+def test_pruned_history_and_bad_cursors(app, client, auth_headers):
+    create(client, auth_headers)
+    last = changes(client)['cursor']
+    create(client, auth_headers)
+    db.session.execute(db.update(ChangeLog).where(ChangeLog.id <= last).values(changed_at=db.func.datetime('now', '-60 days')))
+    db.session.commit()
+    assert app.test_cli_runner().invoke(args=['prune-changes', '--keep-days', '30']).exit_code == 0
+
+    assert client.get('/api/changes?since=0').status_code == 410
+    assert changes(client, last)['books']
+
+    # Everything pruned: an old cursor must not look up to date.
+    db.session.execute(db.delete(ChangeLog))
+    db.session.commit()
+    assert client.get(f'/api/changes?since={last}').status_code == 410
+
+    newest = db.session.scalar(db.text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'"))
+    assert changes(client, newest)['cursor'] == newest
+    assert client.get(f'/api/changes?since={newest + 1}').status_code == 400
+    assert client.get('/api/changes?since=-1').status_code == 400
+
+
+def test_change_feed_is_sqlite_only(client, auth_headers, monkeypatch):
+    before = ChangeLog.query.count()
+    monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+    response = client.get('/api/changes?since=0')
+    assert response.status_code == 501
+
+    # Without a feed to read them, writes don't log changes either.
+    create(client, auth_headers)
+    body = '{"title": "Imported", "author": "Jane Austen", "isbn": "111"}'
+    response = client.post('/api/books/import', data=body, content_type='application/x-ndjson', headers=auth_headers)
+    assert response.get_json()['inserted'] == 1
+    assert ChangeLog.query.count() == before
@@ -0,0 +1,94 @@
+import hashlib
+import io
+import json
+
+import pytest
+
+import app as app_module
+from app import Book, app as flask_app, generate_thumbnails
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def png_bytes(color='red', size=(600, 900)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def uploads(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(flask_app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    # Thumbnails are generated explicitly by the tests that need them.
+    monkeypatch.setattr(app_module.thumbnail_executor, 'submit', lambda *args: None)
+    return tmp_path
+
+
+def create(client, auth_headers, image=None, **form):
+    data = {'title': 'Covered', 'author_id': '1', **form}
+    if image is not None:
+        data['cover_image'] = (io.BytesIO(image), 'cover.png')
+    return client.post('/api/books', data=data, headers=auth_headers, content_type='multipart/form-data')
+
+
+def test_identical_uploads_share_one_content_addressed_file(client, auth_headers, uploads):
+    image = png_bytes()
+    first = create(client, auth_headers, image)
+    second = create(client, auth_headers, image)
+    other = create(client, auth_headers, png_bytes('blue'))
+    assert first.status_code == second.status_code == other.status_code == 201
+
+    filename = f'{hashlib.sha256(image).hexdigest()}.png'
+    assert first.get_json()['cover_image'] == second.get_json()['cover_image'] == filename
+    assert other.get_json()['cover_image'] != filename
+    assert sorted(path.name for path in uploads.iterdir()) == sorted([filename, other.get_json()['cover_image']])
+    assert (uploads / filename).read_bytes() == image
+
+
+@pytest.mark.parametrize('form', [
+    {'title': ''},
+    {'author_id': '99'},
+    {'categories': 'not json'},
+    {'categories': json.dumps([{'category_id': 'x'}])},
+    {'categories': json.dumps([3])},
+])
+def test_rejected_create_leaves_no_file_behind(client, auth_headers, uploads, form):
+    response = create(client, auth_headers, png_bytes(), **form)
+    assert response.status_code == 400
+    assert list(uploads.iterdir()) == []
+    assert Book.query.count() == 0
+
+
+def test_content_addressed_covers_are_immutable(client, auth_headers, uploads):
+    filename = create(client, auth_headers, png_bytes()).get_json()['cover_image']
+    generate_thumbnails(filename)
+
+    for size in ('original', 'small', 'medium'):
+        response = client.get(f'/covers/{size}/{filename}')
+        assert response.status_code == 200
+        assert response.cache_control.max_age == 365 * 24 * 3600
+        assert response.cache_control.immutable
+
+    with Image.open(io.BytesIO(client.get(f'/covers/small/{filename}').data)) as thumbnail:
+        assert max(thumbnail.size) == flask_app.config['THUMBNAIL_SIZES']['small']
+
+
+def test_missing_thumbnail_falls_back_to_a_short_lived_original(client, auth_headers, uploads):
+    image = png_bytes()
+    filename = create(client, auth_headers, image).get_json()['cover_image']
+
+    response = client.get(f'/covers/small/{filename}')
+    assert response.status_code == 200
+    assert response.data == image
+    assert response.cache_control.max_age == 60
+    assert not response.cache_control.immutable
+
+
+def test_legacy_names_and_unknown_sizes(client, uploads):
+    (uploads / 'old-cover.png').write_bytes(png_bytes())
+    response = client.get('/covers/original/old-cover.png')
+    assert response.status_code == 200
+    assert response.cache_control.max_age == 60
+    assert not response.cache_control.immutable
+
+    assert client.get('/covers/huge/old-cover.png').status_code == 404
@@ -0,0 +1,112 @@
+import gzip
+import json
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app, db, response_cache
+
+msgpack = pytest.importorskip('msgpack')
+brotli = pytest.importorskip('brotli')
+
+
+def book_selects(client, url):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statement = ' '.join(statement.split())
+        if re.search(r' FROM book( |$)', statement):
+            statements.append(statement)
+
+    response_cache.clear()
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    # 'author_1.name AS author_1_name' -> 'author.name'
+    select = statements[0].split(' FROM ', 1)[0]
+    columns = {f'{table}.{column}' for table, column in re.findall(r'(\w+?)(?:_\d+)?\.(\w+) AS', select)}
+    return response.get_json(), columns
+
+
+@pytest.mark.parametrize('url', ['/api/books?fields={}', '/api/books/1?fields={}'])
+def test_sparse_fieldsets_select_only_what_they_render(client, add_books, url):
+    add_books(3)
+    body, columns = book_selects(client, url.format('title'))
+    books = body if isinstance(body, list) else [body]
+    assert all(set(book) == {'id', 'title'} for book in books)
+    assert columns == {'book.id', 'book.title'}
+
+    body, columns = book_selects(client, url.format('author_name,cover_urls'))
+    books = body if isinstance(body, list) else [body]
+    assert all(set(book) == {'id', 'author_name', 'cover_urls'} for book in books)
+    assert columns == {'book.id', 'book.cover_image', 'book.author_id', 'author.id', 'author.name'}
+
+
+@pytest.mark.parametrize('url', ['/api/books?fields=title,secret', '/api/books/1?fields=password_hash'])
+def test_unknown_fields_are_rejected(client, add_books, url):
+    add_books(1)
+    response = client.get(url)
+    assert response.status_code == 400
+    assert 'Unknown field' in response.get_json()['error']
+
+
+def test_msgpack_is_served_when_preferred(client, add_books):
+    add_books(3)
+    plain = client.get('/api/books')
+    packed = client.get('/api/books', headers={'Accept': 'application/msgpack'})
+    assert packed.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(packed.data) == plain.get_json()
+    assert 'Accept' in packed.headers['Vary']
+
+    preferred = client.get('/api/books', headers={'Accept': 'application/json, application/msgpack;q=0.5'})
+    assert preferred.mimetype == 'application/json'
+
+
+@pytest.mark.parametrize('encoding, decompress', [('gzip', gzip.decompress), ('br', brotli.decompress)])
+def test_large_responses_are_compressed(client, add_books, monkeypatch, encoding, decompress):
+    add_books(10)
+    plain = client.get('/api/books').data
+    monkeypatch.setitem(flask_app.config, 'COMPRESS_MIN_SIZE', len(plain))
+    response = client.get('/api/books', headers={'Accept-Encoding': encoding})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(response.data) < len(plain)
+    assert json.loads(decompress(response.data)) == json.loads(plain)
+
+    monkeypatch.setitem(flask_app.config, 'COMPRESS_MIN_SIZE', len(plain) + 1)
+    response_cache.clear()
+    response = client.get('/api/books', headers={'Accept-Encoding': encoding})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.data == plain
+
+
+def test_each_representation_is_cached_separately(client, add_books, monkeypatch):
+    add_books(10)
+    monkeypatch.setitem(flask_app.config, 'COMPRESS_MIN_SIZE', 0)
+    variants = [
+        {},
+        {'Accept-Encoding': 'gzip'},
+        {'Accept-Encoding': 'br'},
+        {'Accept': 'application/msgpack'},
+        {'Accept': 'application/msgpack', 'Accept-Encoding': 'gzip'},
+    ]
+    response_cache.clear()
+    first = [client.get('/api/books', headers=headers) for headers in variants]
+    assert response_cache.stats()['entries'] == len(variants)
+    assert len({response.data for response in first}) == len(variants)
+
+    hits = response_cache.stats()['hits']
+    again = [client.get('/api/books', headers=headers) for headers in variants]
+    assert response_cache.stats()['hits'] == hits + len(variants)
+    for before, after in zip(first, again):
+        assert after.data == before.data
+        assert after.headers.get('Content-Encoding') == before.headers.get('Content-Encoding')
+        assert after.mimetype == before.mimetype
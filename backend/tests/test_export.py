@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+
+def export(client, auth_headers, query=''):
+    response = client.get(f'/api/export/books{query}', headers=auth_headers, buffered=False)
+    assert response.status_code == 200
+    chunks = [chunk.decode() for chunk in response.response]
+    return response, chunks
+
+
+def listing(client):
+    return client.get('/api/books?limit=500').get_json()
+
+
+@pytest.mark.parametrize('batch_size, batches', [(1, 7), (3, 3), (7, 1), (50, 1)])
+def test_ndjson_export_streams_one_chunk_per_batch(client, add_books, auth_headers, batch_size, batches):
+    add_books(7)
+    response, chunks = export(client, auth_headers, f'?batch_size={batch_size}')
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(chunks) == batches
+    assert all(chunk.endswith('\n') for chunk in chunks)
+    assert [json.loads(line) for line in ''.join(chunks).splitlines()] == listing(client)
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 7, 50])
+def test_json_export_is_one_array_across_batches(client, add_books, auth_headers, batch_size):
+    add_books(7)
+    response, chunks = export(client, auth_headers, f'?format=json&batch_size={batch_size}')
+    assert response.mimetype == 'application/json'
+    assert json.loads(''.join(chunks)) == listing(client)
+
+
+@pytest.mark.parametrize('fmt, body', [('ndjson', ''), ('json', '[]\n')])
+def test_empty_catalog_exports(client, auth_headers, fmt, body):
+    _, chunks = export(client, auth_headers, f'?format={fmt}')
+    assert ''.join(chunks) == body
+
+
+def test_export_sparse_fieldsets(client, add_books, auth_headers):
+    add_books(3)
+    _, chunks = export(client, auth_headers, '?fields=title,categories&batch_size=2')
+    books = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert [set(book) for book in books] == [{'id', 'title', 'categories'}] * 3
+    assert [len(book['categories']) for book in books] == [1, 2, 3]
+
+    response = client.get('/api/export/books?fields=title,secret', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_export_rejects_unknown_formats_and_needs_auth(client, auth_headers):
+    assert client.get('/api/export/books').status_code == 401
+    assert client.get('/api/export/books?format=xml', headers=auth_headers).status_code == 400
+
+
+def test_export_command_writes_the_whole_catalog(app, client, add_books, tmp_path):
+    add_books(5)
+    for fmt in ('ndjson', 'json'):
+        output = tmp_path / f'books.{fmt}'
+        result = app.test_cli_runner().invoke(
+            args=['export-books', '--format', fmt, '--batch-size', '2', '--output', str(output)]
+        )
+        assert result.exit_code == 0, result.output
+        text = output.read_text()
+        books = json.loads(text) if fmt == 'json' else [json.loads(line) for line in text.splitlines()]
+        assert books == listing(client)
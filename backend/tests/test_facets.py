@@ -0,0 +1,61 @@
+from app import FACETS, current_generation, db, facet_cache, facet_response, response_cache
+
+
+def fresh_facets():
+    return {name: facet_response(name, loader()) for name, loader in FACETS.items()}
+
+
+def test_writes_patch_cached_facets(client, add_books, auth_headers):
+    add_books(8)
+    client.get('/api/stats/facets')
+
+    response = client.put('/api/books/1', json={'publication_year': 1955, 'categories': [{'category_id': 2}]},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    assert 'categories' in facet_cache._values
+    assert client.get('/api/stats/facets').get_json() == fresh_facets()
+
+
+def test_write_in_another_process_drops_cached_facets(client, add_books, write_elsewhere):
+    add_books(8)
+    before = client.get('/api/stats/facets').get_json()
+
+    write_elsewhere('UPDATE book SET publication_year = 1800 WHERE id = 1')
+
+    after = client.get('/api/stats/facets').get_json()
+    assert after != before
+    db.session.expire_all()
+    assert after == fresh_facets()
+
+
+def test_write_during_a_facet_load_is_not_counted_twice(client, add_books, monkeypatch):
+    add_books(8)
+    load = FACETS['decades']
+
+    def load_after_a_write(books=None):
+        # Another writer commits between the generation read and the load.
+        monkeypatch.setitem(FACETS, 'decades', load)
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('UPDATE book SET publication_year = 1800 WHERE id = 1')
+            connection.exec_driver_sql('UPDATE cache_generation SET value = value + 1 WHERE id = 1')
+        return load()
+
+    monkeypatch.setitem(FACETS, 'decades', load_after_a_write)
+    client.get('/api/stats/facets?facets=decades')
+    # The writer's process then patches its cached facets with its deltas.
+    facet_cache.apply(current_generation(), {'decades': {1800: 1, 1900: -1}})
+
+    response_cache.clear()
+    db.session.expire_all()
+    assert client.get('/api/stats/facets?facets=decades').get_json() == {'decades': fresh_facets()['decades']}
+
+
+def test_publication_year_must_be_an_integer(client, add_books, auth_headers):
+    add_books(1)
+    response = client.put('/api/books/1', json={'publication_year': 'abc'}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'publication_year must be an integer'}
+
+    response = client.post('/api/books', data={'title': 'New', 'author_id': 1, 'publication_year': 'abc'},
+                           headers=auth_headers)
+    assert response.status_code == 400
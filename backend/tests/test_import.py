@@ -0,0 +1,54 @@
+import io
+
+from sqlalchemy import event
+
+from app import Author, Book, BookImporter, Category, db, iter_import_rows
+
+
+def test_upsert_looks_up_large_batches_in_chunks(app):
+    rows = [(i, {'title': f'Book {i}', 'author': 'Author', 'isbn': f'isbn-{i}'}) for i in range(1200)]
+    assert BookImporter(upsert=True, batch_size=2000).run(rows)['inserted'] == 1200
+
+    lookups = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and 'book.isbn IN' in statement:
+            lookups.append(len(parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        rows = [(i, {'title': f'Renamed {i}', 'author': 'Author', 'isbn': f'isbn-{i}'}) for i in range(1200)]
+        report = BookImporter(upsert=True, batch_size=2000).run(rows)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert report['updated'] == 1200 and report['inserted'] == 0
+    assert sorted(lookups) == [200, 500, 500]
+    assert db.session.query(Book).count() == 1200
+
+
+def test_rows_dropped_by_upsert_dedup_create_no_names(app):
+    rows = [
+        (1, {'title': 'Draft', 'author': 'Ghost Writer', 'isbn': '42', 'categories': ['Drafts']}),
+        (2, {'title': 'Final', 'author': 'Jane Austen', 'isbn': '42', 'categories': ['Fiction']}),
+    ]
+    report = BookImporter(upsert=True).run(rows)
+    assert report['inserted'] == 1
+    assert Author.query.filter_by(name='Ghost Writer').count() == 0
+    assert Category.query.filter_by(name='Drafts').count() == 0
+    assert [link.category.name for link in Book.query.one().book_categories] == ['Fiction']
+
+
+def test_csv_categories_accept_ids_and_names(app):
+    source = io.StringIO(
+        'title,author,categories\n'
+        'By id,Jane Austen,2|Fantasy\n'
+        'Same twice,Jane Austen,1|Fiction\n'
+        'Unknown id,Jane Austen,99\n'
+    )
+    report = BookImporter().run(iter_import_rows(source, 'csv'))
+    assert report['inserted'] == 2
+    assert report['errors'] == [{'line': 4, 'error': 'Category 99 not found'}]
+    assert Category.query.filter_by(name='2').count() == 0
+    links = {book.title: sorted(link.category_id for link in book.book_categories) for book in Book.query}
+    assert links == {'By id': [2, 3], 'Same twice': [1]}
@@ -0,0 +1,61 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import app as flask_app, db, metrics, response_cache
+
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, '_routes', {})
+    return metrics
+
+
+def test_metrics_report_per_route_series(client, add_books, fresh_metrics):
+    add_books(3)
+    client.get('/api/books')
+    client.get('/api/books/1')
+    client.get('/api/books/999')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'library_http_request_duration_seconds_count{method="GET",route="/api/books"} 1' in body
+    assert 'library_http_requests_total{method="GET",route="/api/books/<int:book_id>",status="200"} 1' in body
+    assert 'library_http_requests_total{method="GET",route="/api/books/<int:book_id>",status="404"} 1' in body
+    assert 'library_db_statements_per_request_count{method="GET",route="/api/books"} 1' in body
+    assert 'library_response_cache_misses_total' in body
+
+
+def test_query_count_header(client, add_books, monkeypatch):
+    add_books(3)
+    assert 'X-Query-Count' not in client.get('/api/books/1').headers
+
+    monkeypatch.setitem(flask_app.config, 'QUERY_COUNT_HEADER', True)
+    response_cache.clear()
+    response = client.get('/api/books/1')
+    assert response.headers['X-Query-Count'] == '3'
+    assert float(response.headers['X-DB-Time-Ms']) >= 0
+    # A cache hit only reads the generation.
+    assert client.get('/api/books/1').headers['X-Query-Count'] == '1'
+
+
+def test_slow_queries_are_logged(client, add_books, monkeypatch, caplog):
+    add_books(1)
+    client.get('/api/books/1')
+    assert not [record for record in caplog.records if 'slow query' in record.getMessage()]
+
+    monkeypatch.setitem(flask_app.config, 'SLOW_QUERY_MS', 1e-6)
+    response_cache.clear()
+    with caplog.at_level(logging.WARNING, logger=flask_app.logger.name):
+        client.get('/api/books/1')
+    slow = [record.getMessage() for record in caplog.records if 'slow query' in record.getMessage()]
+    assert any('FROM book' in message for message in slow)
+
+
+def test_failed_statements_do_not_leak_timers(app):
+    with db.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql('SELECT * FROM no_such_table')
+        assert 'query_start' not in conn.info
+        conn.exec_driver_sql('SELECT 1')
+        assert 'query_start' not in conn.info
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import Author, Book, Category, db, encode_cursor
+
+
+@pytest.fixture
+def catalog(add_books):
+    add_books(13)
+    # Repeat timestamps so the id tie-breaker is exercised too.
+    for book in Book.query:
+        book.created_at = datetime(2020, 1, 1) + timedelta(days=book.id % 4)
+        book.updated_at = datetime(2021, 1, 1) + timedelta(hours=book.id % 3)
+    db.session.commit()
+    return Book.query.all()
+
+
+def walk(client, url, limit=3):
+    ids, pages = [], 0
+    response = client.get(f'{url}{"&" if "?" in url else "?"}limit={limit}')
+    while True:
+        assert response.status_code == 200
+        ids += [item['id'] for item in response.get_json()]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids, pages
+        assert f'after={cursor}' in response.headers['Link']
+        response = client.get(f'{url}{"&" if "?" in url else "?"}limit={limit}&after={cursor}')
+
+
+@pytest.mark.parametrize('key', ['id', 'title', 'created_at', 'updated_at'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_cursor_round_trips_for_every_sort_key(client, catalog, key, descending):
+    expected = [book.id for book in sorted(catalog, key=lambda book: (getattr(book, key), book.id), reverse=descending)]
+    ids, pages = walk(client, f"/api/books?sort={'-' if descending else ''}{key}")
+    assert ids == expected
+    assert pages == 5
+
+
+@pytest.mark.parametrize('url, model', [
+    ('/api/authors?sort=name', Author),
+    ('/api/authors?sort=-id', Author),
+    ('/api/categories?sort=name', Category),
+])
+def test_author_and_category_listings_page_through_everything(client, catalog, url, model):
+    ids, _ = walk(client, url, limit=1)
+    assert sorted(ids) == [row.id for row in model.query.order_by(model.id)]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('author_id=1', lambda book: book.author_id == 1),
+    ('category_id=2', lambda book: 2 in [link.category_id for link in book.book_categories]),
+    ('year_from=1903&year_to=1907', lambda book: 1903 <= book.publication_year <= 1907),
+    ('title_prefix=Book 1', lambda book: book.title.startswith('Book 1')),
+])
+def test_filters_apply_on_every_page(client, catalog, query, expected):
+    ids, _ = walk(client, f'/api/books?{query}&sort=title', limit=2)
+    assert sorted(ids) == sorted(book.id for book in catalog if expected(book))
+
+
+def test_title_prefix_matches_characters_beyond_the_basic_plane(client, catalog):
+    db.session.add(Book(title='Book \U0001f4da', author_id=1))
+    db.session.commit()
+    titles = [book['title'] for book in client.get('/api/books?title_prefix=Book ').get_json()]
+    assert 'Book \U0001f4da' in titles
+
+
+@pytest.mark.parametrize('query', [
+    'limit=abc',
+    'after=not-a-cursor',
+    f"after={encode_cursor([1])}",
+    f"sort=created_at&after={encode_cursor(['yesterday', 1])}",
+    'sort=pages',
+    'sort=-isbn',
+])
+def test_bad_paging_arguments_are_rejected(client, catalog, query):
+    response = client.get(f'/api/books?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event
+
+from app import db, response_cache
+
+
+def count_queries(client, url):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    response_cache.clear()
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', ['/api/books?limit=500', '/api/books/1'])
+def test_book_reads_use_a_constant_number_of_queries(client, add_books, url):
+    add_books(5)
+    small = count_queries(client, url)
+    add_books(95)
+    large = count_queries(client, url)
+
+    # Cache generation, books, then category links with their categories;
+    # authors are joined.
+    assert small == large == 3
+
+
+def test_book_listing_returns_every_category(client, add_books):
+    add_books(8)
+    books = client.get('/api/books').get_json()
+    assert len(books) == 8
+    assert [len(book['categories']) for book in books] == [1, 2, 3, 4, 1, 2, 3, 4]
+    assert all(book['author_name'] for book in books)
+
+
+def test_bulk_update_uses_a_constant_number_of_queries(client, add_books, auth_headers):
+    def patch_all(count):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        updates = [{'id': book_id, 'pages': 100} for book_id in range(1, count + 1)]
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = client.patch('/api/books', json=updates, headers=auth_headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert response.status_code == 200
+        assert [book['id'] for book in response.get_json()] == list(range(1, count + 1))
+        return len(statements)
+
+    add_books(5)
+    small = patch_all(5)
+    add_books(15)
+    large = patch_all(20)
+    assert small == large
+
+
+def test_bulk_update_rejects_duplicate_ids(client, add_books, auth_headers):
+    add_books(1)
+    updates = [{'id': 1, 'categories': [1]}, {'id': 1, 'categories': [1, 2]}]
+    response = client.patch('/api/books', json=updates, headers=auth_headers)
+    assert response.status_code == 400
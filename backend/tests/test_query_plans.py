@@ -0,0 +1,94 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app import Author, Book, BookCategory, db, encode_cursor, response_cache
+
+# Requests whose queries must stay index-backed. Cursors are synthetic;
+# only the shape of the resulting SQL matters.
+QUERY_PLAN_CHECKS = [
+    '/api/books',
+    f"/api/books?after={encode_cursor([1, 1])}",
+    '/api/books?author_id=1',
+    '/api/books?category_id=1',
+    '/api/books?year_from=1900&year_to=1950',
+    '/api/books?title_prefix=A',
+    f"/api/books?sort=title&after={encode_cursor(['A', 1])}",
+    f"/api/books?sort=-updated_at&after={encode_cursor(['2000-01-01T00:00:00', 1])}",
+    '/api/books/1',
+    '/api/books?ids=1,2,3',
+    '/api/books/search?q=a*',
+    '/api/authors',
+    f"/api/authors?sort=name&after={encode_cursor(['A', 1])}",
+    '/api/categories',
+    '/api/stats/facets?author_id=1',
+    '/api/stats/facets?category_id=1&facets=authors,decades',
+    '/api/changes?since=1',
+]
+
+# Older SQLite versions print 'SCAN TABLE book', newer ones 'SCAN book'.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( USING (COVERING )?INDEX \w+)?$')
+
+
+def extra_plan_statements():
+    # Category loading (skipped by the requests above on an empty catalog)
+    # and statements issued by the write routes and the bulk importer.
+    return [
+        db.select(BookCategory).where(BookCategory.book_id.in_([1, 2])),
+        db.delete(BookCategory).where(BookCategory.book_id == 1),
+        db.update(Author).where(Author.id == 1).values(book_count=Author.book_count + 1),
+        db.select(Book.isbn, Book.id, Book.author_id).where(Book.isbn.in_(['0000000000'])),
+        db.select(Book.id).where(Book.author_id == 1),
+    ]
+
+
+def full_scans(statement, parameters):
+    plan = [row[-1] for row in db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+    statement = ' '.join(statement.split())
+    # A scan with no WHERE but a LIMIT is a bounded page walk, unless the
+    # rows have to be sorted first, which reads the whole table.
+    bounded = ' LIMIT ' in statement and ' WHERE ' not in statement
+    if bounded and not any('USE TEMP B-TREE' in step for step in plan):
+        return []
+    # sqlite_sequence holds one row per AUTOINCREMENT table.
+    plan = [step for step in plan if not step.endswith(' sqlite_sequence')]
+    return [step for step in plan if FULL_SCAN.match(step)]
+
+
+def test_full_scan_pattern_matches_old_and_new_sqlite_output():
+    assert FULL_SCAN.match('SCAN book')
+    assert FULL_SCAN.match('SCAN TABLE book')
+    assert FULL_SCAN.match('SCAN TABLE book USING COVERING INDEX ix_book_title')
+    assert not FULL_SCAN.match('SEARCH book USING INTEGER PRIMARY KEY (rowid=?)')
+
+
+@pytest.mark.parametrize('url', QUERY_PLAN_CHECKS)
+def test_endpoint_queries_are_index_backed(client, url):
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            captured.append((statement, parameters))
+
+    # GET routes may be served by the replica engine, so listen on all of them.
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        response_cache.clear()
+        client.get(url)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+    assert captured
+    for statement, parameters in captured:
+        assert not full_scans(statement, parameters), statement
+
+
+@pytest.mark.parametrize('statement', extra_plan_statements(), ids=lambda statement: str(statement).split()[0])
+def test_write_and_import_statements_are_index_backed(app, statement):
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    assert not full_scans(str(compiled), parameters), str(compiled)
@@ -0,0 +1,32 @@
+from app import CacheGeneration, db, response_cache
+
+
+def test_cached_listing_is_served_from_cache(client, add_books):
+    add_books(3)
+    first = client.get('/api/books')
+    hits = response_cache.hits
+    second = client.get('/api/books')
+    assert response_cache.hits == hits + 1
+    assert second.get_data() == first.get_data()
+
+
+def test_write_in_another_process_invalidates_the_cache(client, add_books, write_elsewhere):
+    add_books(3)
+    first = client.get('/api/books/1')
+    assert first.get_json()['title'] == 'Book 0'
+
+    write_elsewhere("UPDATE book SET title = 'Renamed' WHERE id = 1")
+
+    conditional = client.get('/api/books/1', headers={'If-None-Match': first.headers['ETag']})
+    assert conditional.status_code == 200
+    assert conditional.get_json()['title'] == 'Renamed'
+
+
+def test_write_routes_bump_the_shared_generation(client, add_books, auth_headers):
+    add_books(1)
+    before = db.session.execute(db.select(CacheGeneration.value)).scalar()
+    response = client.put('/api/books/1', json={'title': 'Edited'}, headers=auth_headers)
+    assert response.status_code == 200
+    db.session.expire_all()
+    assert db.session.execute(db.select(CacheGeneration.value)).scalar() == before + 1
+    assert client.get('/api/books/1').get_json()['title'] == 'Edited'
@@ -0,0 +1,96 @@
+import pytest
+
+from app import Author, Book, app as flask_app, db, response_cache
+
+
+@pytest.fixture
+def library(app):
+    books = [
+        Book(title='The Winter Garden', description='A quiet story of frost', author_id=1),
+        Book(title='Garden of Stone', description='Winter falls on the garden', author_id=2),
+        Book(title='Shadow River', description='Garden paths by the river', author_id=3),
+        Book(title='Shadows', description=None, author_id=1),
+    ]
+    db.session.add_all(books)
+    db.session.commit()
+    return books
+
+
+def search(client, q, **args):
+    # These tests write through the ORM, which doesn't bump the cache generation.
+    response_cache.clear()
+    response = client.get('/api/books/search', query_string={'q': q, **args})
+    assert response.status_code == 200, response.get_json()
+    return [book['id'] for book in response.get_json()]
+
+
+def test_ranks_title_matches_above_description_matches(client, library):
+    assert search(client, 'winter') == [library[0].id, library[1].id]
+
+
+def test_phrase_and_prefix_queries(client, library):
+    assert search(client, '"winter garden"') == [library[0].id]
+    assert search(client, 'shadow') == [library[2].id]
+    assert sorted(search(client, 'shad*')) == [library[2].id, library[3].id]
+    assert sorted(search(client, 'sh*')) == [library[2].id, library[3].id]
+
+
+@pytest.mark.parametrize('q', ['title:winter', 'winter OR NOT', 'NEAR(winter garden)', '-winter', 'winter^', 'garden AND'])
+def test_fts_operators_in_input_are_treated_as_text(client, library, q):
+    response = client.get('/api/books/search', query_string={'q': q})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('q', ['', '   ', '"', '*', '""'])
+def test_empty_queries_are_rejected(client, library, q):
+    assert client.get('/api/books/search', query_string={'q': q}).status_code == 400
+
+
+def test_index_follows_updates_deletes_and_author_renames(client, library):
+    library[3].title = 'Lanterns'
+    db.session.commit()
+    assert search(client, 'lanterns') == [library[3].id]
+    assert search(client, 'shadows') == []
+
+    db.session.delete(library[2])
+    db.session.commit()
+    assert search(client, 'river') == []
+
+    db.session.get(Author, 1).name = 'Mary Shelley'
+    db.session.commit()
+    assert sorted(search(client, 'shelley')) == [library[0].id, library[3].id]
+    assert search(client, 'austen') == []
+
+    library[1].author_id = 1
+    db.session.commit()
+    assert sorted(search(client, 'shelley')) == [library[0].id, library[1].id, library[3].id]
+
+
+def test_rank_cursor_pages_through_every_match(client, app):
+    db.session.add_all(Book(title=f'Garden {i}', description='garden ' * (i % 3), author_id=1) for i in range(12))
+    db.session.commit()
+    everything = search(client, 'garden', limit=100)
+    assert len(everything) == 12
+
+    ids, url = [], '/api/books/search?q=garden&limit=5'
+    while url:
+        response = client.get(url)
+        ids += [book['id'] for book in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/books/search?q=garden&limit=5&after={cursor}' if cursor else None
+    assert ids == everything
+
+
+def test_broad_queries_come_back_newest_first(client, app, monkeypatch):
+    db.session.add_all(Book(title='Garden', description=None, author_id=1) for _ in range(5))
+    db.session.add(Book(title='Garden garden garden', description='garden', author_id=1))
+    db.session.commit()
+    best = Book.query.order_by(Book.id.desc()).first().id
+    assert search(client, 'garden')[0] == best
+    assert search(client, 'garden')[1:] == [1, 2, 3, 4, 5]
+
+    monkeypatch.setitem(flask_app.config, 'SEARCH_CANDIDATES', 5)
+    assert search(client, 'garden') == [6, 5, 4, 3, 2, 1]
+    first = client.get('/api/books/search?q=garden&limit=4')
+    rest = client.get(f"/api/books/search?q=garden&limit=4&after={first.headers['X-Next-Cursor']}")
+    assert [book['id'] for book in first.get_json() + rest.get_json()] == [6, 5, 4, 3, 2, 1]
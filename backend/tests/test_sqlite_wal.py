@@ -0,0 +1,57 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from app import app
+
+
+@pytest.fixture
+def open_database(tmp_path, monkeypatch):
+    # Connections get their PRAGMAs from the app's connect listener, as the
+    # app's own engines do.
+    def open_database(journal_mode):
+        pragmas = dict(app.config['SQLITE_PRAGMAS'], journal_mode=journal_mode, busy_timeout=200)
+        monkeypatch.setitem(app.config, 'SQLITE_PRAGMAS', pragmas)
+        engine = create_engine(f"sqlite:///{tmp_path / f'{journal_mode}.db'}")
+        with engine.begin() as connection:
+            connection.exec_driver_sql('CREATE TABLE book (id INTEGER PRIMARY KEY, title TEXT)')
+            connection.exec_driver_sql("INSERT INTO book (title) VALUES ('First')")
+        return engine
+    return open_database
+
+
+def hold_write_lock(engine):
+    writer = engine.raw_connection()
+    writer.driver_connection.isolation_level = None
+    writer.execute('BEGIN EXCLUSIVE')
+    writer.execute("INSERT INTO book (title) VALUES ('Uncommitted')")
+    return writer
+
+
+def test_reads_are_not_blocked_by_a_long_write_under_wal(open_database):
+    engine = open_database('WAL')
+    with engine.connect() as reader:
+        writer = hold_write_lock(engine)
+        try:
+            start = time.monotonic()
+            titles = reader.exec_driver_sql('SELECT title FROM book').scalars().all()
+            elapsed = time.monotonic() - start
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+    assert titles == ['First']
+    assert elapsed < 0.1
+
+
+def test_reads_wait_for_a_long_write_under_the_rollback_journal(open_database):
+    engine = open_database('DELETE')
+    with engine.connect() as reader:
+        writer = hold_write_lock(engine)
+        try:
+            with pytest.raises(OperationalError, match='database is locked'):
+                reader.exec_driver_sql('SELECT title FROM book').all()
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
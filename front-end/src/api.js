@@ -0,0 +1,15 @@
+// Fetches every item of a paginated listing by following X-Next-Cursor.
+export async function fetchAll(path) {
+  const url = `${path}${path.includes('?') ? '&' : '?'}limit=500`;
+  const items = [];
+  let after = null;
+  do {
+    const response = await fetch(after ? `${url}&after=${encodeURIComponent(after)}` : url);
+    if (!response.ok) {
+      throw new Error(`GET ${path} failed with ${response.status}`);
+    }
+    items.push(...(await response.json()));
+    after = response.headers.get('X-Next-Cursor');
+  } while (after);
+  return items;
+}
@@ -4,6 +4,7 @@ import { Formik, Form, Field, FieldArray, ErrorMessage } from 'formik';
 import * as Yup from 'yup';
 import { Plus, Minus, Save, ArrowLeft } from 'lucide-react';
 import LoadingSpinner from '../components/LoadingSpinner';
+import { fetchAll } from '../api';
 
 const validationSchema = Yup.object({
   title: Yup.string().required('Title is required').min(1).max(200),
@@ -34,12 +35,12 @@ function AddBook() {
 
   const fetchData = async () => {
     try {
-      const [authorsResponse, categoriesResponse] = await Promise.all([
-        fetch('/api/authors'),
-        fetch('/api/categories')
+      const [authorsData, categoriesData] = await Promise.all([
+        fetchAll('/api/authors'),
+        fetchAll('/api/categories')
       ]);
-      setAuthors(await authorsResponse.json());
-      setCategories(await categoriesResponse.json());
+      setAuthors(authorsData);
+      setCategories(categoriesData);
     } catch {
       console.error('Error fetching authors/categories');
     } finally {
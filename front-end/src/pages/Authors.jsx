@@ -23,6 +23,7 @@ const validationSchema = Yup.object({
 
 function Authors() {
   const [authors, setAuthors] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [showForm, setShowForm] = useState(false);
 
@@ -30,11 +31,12 @@ function Authors() {
     fetchAuthors();
   }, []);
 
-  const fetchAuthors = async () => {
+  const fetchAuthors = async (after = null) => {
     try {
-      const response = await fetch('/api/authors');
+      const response = await fetch(after ? `/api/authors?after=${after}` : '/api/authors');
       const data = await response.json();
-      setAuthors(data);
+      setAuthors(prev => (after ? [...prev, ...data] : data));
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (error) {
       console.error('Error fetching authors:', error);
     } finally {
@@ -189,6 +191,14 @@ function Authors() {
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="text-center my-4">
+          <button className="btn btn-outline-secondary" onClick={() => fetchAuthors(nextCursor)}>
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 }
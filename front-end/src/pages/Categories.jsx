@@ -3,6 +3,7 @@ import { Formik, Form, Field, ErrorMessage } from 'formik';
 import * as Yup from 'yup';
 import { Plus, Tag, FileText } from 'lucide-react';
 import LoadingSpinner from '../components/LoadingSpinner';
+import { fetchAll } from '../api';
 
 const containerStyle = {
   padding: '20px',
@@ -130,6 +131,11 @@ const categoryCardDescriptionStyle = {
   marginBottom: '16px',
 };
 
+const categoryCardCountStyle = {
+  fontSize: '12px',
+  color: '#999',
+};
+
 const validationSchema = Yup.object({
   name: Yup.string()
     .required('Category name is required')
@@ -140,18 +146,18 @@ const validationSchema = Yup.object({
 
 function Categories() {
   const [categories, setCategories] = useState([]);
+  const [bookCounts, setBookCounts] = useState({});
   const [loading, setLoading] = useState(true);
   const [showForm, setShowForm] = useState(false);
 
   useEffect(() => {
     fetchCategories();
+    fetchBookCounts();
   }, []);
 
   const fetchCategories = async () => {
     try {
-      const response = await fetch('/api/categories');
-      const data = await response.json();
-      setCategories(data);
+      setCategories(await fetchAll('/api/categories'));
     } catch (error) {
       console.error('Error fetching categories:', error);
     } finally {
@@ -159,6 +165,16 @@ function Categories() {
     }
   };
 
+  const fetchBookCounts = async () => {
+    try {
+      const response = await fetch('/api/stats/facets?facets=categories');
+      const data = await response.json();
+      setBookCounts(Object.fromEntries(data.categories.map(facet => [facet.id, facet.count])));
+    } catch (error) {
+      console.error('Error fetching category counts:', error);
+    }
+  };
+
   const handleSubmit = async (values, { setSubmitting, resetForm, setFieldError }) => {
     try {
       const response = await fetch('/api/categories', {
@@ -289,7 +305,7 @@ function Categories() {
       ) : (
         <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(240px, 1fr))', gap: '24px' }}>
           {categories.map((category) => (
-            <CategoryCard key={category.id} category={category} />
+            <CategoryCard key={category.id} category={category} bookCount={bookCounts[category.id] || 0} />
           ))}
         </div>
       )}
@@ -297,7 +313,7 @@ function Categories() {
   );
 }
 
-function CategoryCard({ category }) {
+function CategoryCard({ category, bookCount }) {
   return (
     <div style={categoryCardStyle}>
       <div style={categoryCardHeaderStyle}>
@@ -310,6 +326,8 @@ function CategoryCard({ category }) {
       {category.description && (
         <p style={categoryCardDescriptionStyle}>{category.description}</p>
       )}
+
+      <p style={categoryCardCountStyle}>{bookCount} {bookCount === 1 ? 'book' : 'books'}</p>
     </div>
   );
 }
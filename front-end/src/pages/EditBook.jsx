@@ -4,6 +4,7 @@ import { Formik, Form, Field, FieldArray, ErrorMessage } from 'formik';
 import * as Yup from 'yup';
 import { Plus, Minus, Save, ArrowLeft } from 'lucide-react';
 import LoadingSpinner from '../components/LoadingSpinner';
+import { fetchAll } from '../api';
 
 const validationSchema = Yup.object({
   title: Yup.string()
@@ -55,15 +56,13 @@ function EditBook() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [bookResponse, authorsResponse, categoriesResponse] = await Promise.all([
+        const [bookResponse, authorsData, categoriesData] = await Promise.all([
           fetch(`/api/books/${id}`),
-          fetch('/api/authors'),
-          fetch('/api/categories')
+          fetchAll('/api/authors'),
+          fetchAll('/api/categories')
         ]);
         
         const bookData = await bookResponse.json();
-        const authorsData = await authorsResponse.json();
-        const categoriesData = await categoriesResponse.json();
         
         setBook(bookData);
         setAuthors(authorsData);
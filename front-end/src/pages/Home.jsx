@@ -1,22 +1,42 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link, NavLink } from 'react-router-dom';
 import { Plus, Search, Edit2, Trash2, Clock, User, BookOpen } from 'lucide-react';
 import LoadingSpinner from '../components/LoadingSpinner';
 
+const LIST_FIELDS = 'title,author_name,description,publication_year,pages';
+
+// Searches the whole catalog, treating every word as a prefix so results
+// update while the user is typing.
+function booksUrl(searchTerm) {
+  const words = searchTerm.trim().split(/\s+/).filter(Boolean);
+  if (words.length === 0) return `/api/books?fields=${LIST_FIELDS}`;
+  const query = searchTerm.includes('"') ? searchTerm : words.map(word => `${word}*`).join(' ');
+  return `/api/books/search?q=${encodeURIComponent(query)}&fields=${LIST_FIELDS}`;
+}
+
 function Home() {
   const [books, setBooks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const latestUrl = useRef(null);
 
   useEffect(() => {
-    fetchBooks();
-  }, []);
+    const timer = setTimeout(() => fetchBooks(searchTerm), searchTerm ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-  const fetchBooks = async () => {
+  const fetchBooks = async (term, after = null) => {
+    const url = booksUrl(term);
+    latestUrl.current = url;
     try {
-      const response = await fetch('/api/books');
+      const response = await fetch(after ? `${url}&after=${encodeURIComponent(after)}` : url);
       const data = await response.json();
-      setBooks(data);
+      // A slower response for an earlier search term must not overwrite the current one.
+      if (latestUrl.current !== url) return;
+      if (!response.ok) throw new Error(data.error);
+      setBooks(prev => (after ? [...prev, ...data] : data));
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (error) {
       console.error('Error fetching books:', error);
     } finally {
@@ -43,11 +63,6 @@ function Home() {
     }
   };
 
-  const filteredBooks = books.filter(book =>
-    book.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    book.author_name.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) return <LoadingSpinner />;
 
   return (
@@ -93,24 +108,32 @@ function Home() {
         </div>
       </div>
 
-      {filteredBooks.length === 0 ? (
+      {books.length === 0 ? (
         <div className="text-center py-5">
           <div className="mb-4">
             <BookOpen className="mx-auto" size={48} />
           </div>
           <h3 className="h5 mb-3">No books found</h3>
-          <p className="text-muted mb-4">Get started by adding your first book!</p>
+          <p className="text-muted mb-4">{searchTerm ? 'Try a different search.' : 'Get started by adding your first book!'}</p>
           <Link className="btn btn-primary" to="/add-book">
             <Plus className="me-2" /> Add Book
           </Link>
         </div>
       ) : (
         <div className="row row-cols-1 row-cols-md-2 row-cols-lg-3 g-4">
-          {filteredBooks.map((book) => (
+          {books.map((book) => (
             <BookCard key={book.id} book={book} onDelete={handleDeleteBook} />
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="text-center my-4">
+          <button className="btn btn-outline-secondary" onClick={() => fetchBooks(searchTerm, nextCursor)}>
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 }